@@ -0,0 +1,334 @@
+import os
+import re
+import sys
+import json
+import time
+import socket
+import select
+import hashlib
+import logging
+import argparse
+import threading
+import http.client
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Local caching proxy for the browsers under test. Static resources (CSS, JS, fonts,
+# images) are kept on disk under the hash of their content, bounded in size with LRU
+# eviction and refetched after a TTL, so that every new browser profile does not
+# download them again. Everything else (cart, checkout, pages, POSTs) passes through.
+#
+# HTTPS is tunneled with CONNECT and cannot be cached without intercepting TLS; the
+# cache works for plain HTTP targets such as the local stand-in shop.
+#
+# Usage: python asset_proxy.py --port 8899   (or --asset-proxy in the test suite)
+
+CACHE_DIR = ".asset_cache"
+STATIC_PATH = re.compile(r"\.(css|js|png|jpe?g|gif|svg|webp|ico|woff2?|ttf|eot|otf|map)$", re.I)
+STATIC_TYPES = ("text/css", "image/", "font/", "application/javascript", "text/javascript",
+                "application/x-javascript", "application/font", "application/vnd.ms-fontobject")
+DYNAMIC_PATH = re.compile(r"/(cart|checkout|onepagecheckout|addproducttocart|login|logout|customer|"
+                          r"productreviews|wishlist|compareproducts)\b", re.I)
+HOP_BY_HOP = {"connection", "proxy-connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+              "te", "trailers", "transfer-encoding", "upgrade", "content-length"}
+CONDITIONAL = {"if-modified-since", "if-none-match", "if-range", "if-match", "if-unmodified-since"}
+
+
+# Disk cache: index.json maps URLs to content hashes, objects/<sha256> holds the bodies.
+# Identical bodies under several URLs are stored once.
+class AssetCache:
+    def __init__(self, directory=CACHE_DIR, max_bytes=200 * 1024 * 1024, ttl=86400):
+        self.directory = directory
+        self.objects = os.path.join(directory, "objects")
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        os.makedirs(self.objects, exist_ok=True)
+        self.index = self._load_index()
+        hashes = self._hashes()
+        for name in os.listdir(self.objects):
+            if name not in hashes:
+                os.remove(self._path(name))
+        self.size = sum(os.path.getsize(self._path(digest)) for digest in hashes)
+        self._evict()
+
+    def _load_index(self):
+        path = os.path.join(self.directory, "index.json")
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path) as f:
+                index = json.load(f)
+        except (OSError, ValueError) as ex:
+            logger.info(f"Ignoring unreadable asset cache index: {ex}")
+            return {}
+        return {url: entry for url, entry in index.items() if os.path.exists(self._path(entry["hash"]))}
+
+    def _path(self, digest):
+        return os.path.join(self.objects, digest)
+
+    def _hashes(self):
+        return {entry["hash"] for entry in self.index.values()}
+
+    # (headers, body) of a fresh entry, or None
+    def lookup(self, url):
+        with self.lock:
+            entry = self.index.get(url)
+            if not entry:
+                return None
+            if time.time() - entry["stored"] > self.ttl:
+                self._remove(url)
+                return None
+            entry["used"] = time.time()
+            try:
+                with open(self._path(entry["hash"]), "rb") as f:
+                    return entry["headers"], f.read()
+            except OSError:
+                self._remove(url)
+                return None
+
+    def store(self, url, headers, body):
+        digest = hashlib.sha256(body).hexdigest()
+        with self.lock:
+            if url in self.index:
+                self._remove(url)
+            path = self._path(digest)
+            if not os.path.exists(path):
+                temporary = f"{path}.{threading.get_ident()}.tmp"
+                with open(temporary, "wb") as f:
+                    f.write(body)
+                os.replace(temporary, path)
+                self.size += len(body)
+            now = time.time()
+            self.index[url] = {"hash": digest, "size": len(body), "headers": headers, "stored": now, "used": now}
+            self._evict()
+
+    # Dropping least recently used entries until the objects fit into max_bytes
+    def _evict(self):
+        while self.size > self.max_bytes and self.index:
+            url = min(self.index, key=lambda u: self.index[u]["used"])
+            self._remove(url)
+
+    def _remove(self, url):
+        entry = self.index.pop(url)
+        if entry["hash"] not in self._hashes():
+            try:
+                os.remove(self._path(entry["hash"]))
+                self.size -= entry["size"]
+            except OSError:
+                pass
+
+    def save(self):
+        with self.lock:
+            path = os.path.join(self.directory, "index.json")
+            with open(f"{path}.tmp", "w") as f:
+                json.dump(self.index, f)
+            os.replace(f"{path}.tmp", path)
+
+
+class ProxyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        logger.debug(f"Asset proxy: {format % args}")
+
+    @property
+    def proxy(self):
+        return self.server.proxy
+
+    def do_GET(self):
+        self.forward("GET")
+
+    def do_HEAD(self):
+        self.forward("HEAD")
+
+    def do_POST(self):
+        self.forward("POST")
+
+    def do_PUT(self):
+        self.forward("PUT")
+
+    def do_DELETE(self):
+        self.forward("DELETE")
+
+    def do_PATCH(self):
+        self.forward("PATCH")
+
+    def do_OPTIONS(self):
+        self.forward("OPTIONS")
+
+    def forward(self, method):
+        url = urlsplit(self.path)
+        if url.scheme != "http" or not url.netloc:
+            self.send_error(400, "Only absolute http:// URLs are proxied")
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else None
+        cacheable = method == "GET" and self.proxy.cacheable_request(url)
+        if cacheable:
+            cached = self.proxy.cache.lookup(self.path)
+            if cached:
+                headers, data = cached
+                self.proxy.count("hits", len(data))
+                return self.respond(200, headers, data)
+        headers = [(name, value) for name, value in self.headers.items()
+                   if name.lower() not in HOP_BY_HOP and not (cacheable and name.lower() in CONDITIONAL)]
+        try:
+            status, response_headers, data = self.proxy.fetch(method, url, headers, body)
+        except OSError as ex:
+            self.send_error(502, f"Upstream error: {ex}")
+            return
+        if cacheable and self.proxy.cacheable_response(status, response_headers):
+            # cookies belong to the browser that caused the fetch, never to later cache hits
+            stored = [(name, value) for name, value in response_headers if name.lower() != "set-cookie"]
+            self.proxy.cache.store(self.path, stored, data)
+            self.proxy.count("misses", len(data))
+        else:
+            self.proxy.count("passed", len(data))
+        self.respond(status, response_headers, data, head=method == "HEAD")
+
+    def respond(self, status, headers, data, head=False):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(data)
+
+    # HTTPS: a blind tunnel, nothing can be cached
+    def do_CONNECT(self):
+        host, _, port = self.path.rpartition(":")
+        try:
+            upstream = socket.create_connection((host, int(port or 443)), timeout=10)
+        except OSError as ex:
+            self.send_error(502, f"Cannot connect to {self.path}: {ex}")
+            return
+        self.send_response(200, "Connection Established")
+        self.end_headers()
+        self.proxy.count("tunnels")
+        sockets = [self.connection, upstream]
+        try:
+            while True:
+                readable, _, failed = select.select(sockets, [], sockets, 60)
+                if failed or not readable:
+                    break
+                for source in readable:
+                    data = source.recv(65536)
+                    if not data:
+                        return
+                    (upstream if source is self.connection else self.connection).sendall(data)
+        except OSError:
+            pass
+        finally:
+            upstream.close()
+            self.close_connection = True
+
+
+class ProxyServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class AssetProxy:
+    def __init__(self, host="127.0.0.1", port=0, cache_dir=CACHE_DIR, max_bytes=200 * 1024 * 1024, ttl=86400):
+        self.cache = AssetCache(cache_dir, max_bytes, ttl)
+        self.server = ProxyServer((host, port), ProxyHandler)
+        self.server.proxy = self
+        self.thread = None
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "passed": 0, "tunnels": 0, "bytes_saved": 0, "bytes_fetched": 0}
+
+    @property
+    def address(self):
+        host, port = self.server.server_address[:2]
+        return f"{host}:{port}"
+
+    def count(self, outcome, size=0):
+        with self.lock:
+            self.stats[outcome] += 1
+            self.stats["bytes_saved" if outcome == "hits" else "bytes_fetched"] += size
+
+    def cacheable_request(self, url):
+        return not DYNAMIC_PATH.search(url.path) and bool(STATIC_PATH.search(url.path))
+
+    def cacheable_response(self, status, headers):
+        values = {name.lower(): value.lower() for name, value in headers}
+        if status != 200 or "cookie" in values.get("vary", ""):
+            return False
+        if any(directive in values.get("cache-control", "") for directive in ("no-store", "private")):
+            return False
+        return values.get("content-type", "").startswith(STATIC_TYPES)
+
+    # One request upstream over a keep-alive connection of the handler thread
+    def fetch(self, method, url, headers, body):
+        pool = self.local.__dict__.setdefault("connections", {})
+        path = (url.path or "/") + (f"?{url.query}" if url.query else "")
+        for attempt in range(2):
+            connection = pool.get(url.netloc)
+            if connection is None:
+                connection = pool[url.netloc] = http.client.HTTPConnection(url.netloc, timeout=30)
+            try:
+                connection.request(method, path, body=body, headers=dict(headers))
+                response = connection.getresponse()
+                data = response.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionError, http.client.CannotSendRequest):
+                connection.close()
+                pool.pop(url.netloc, None)
+                if attempt:
+                    raise
+        response_headers = [(name, value) for name, value in response.getheaders()
+                            if name.lower() not in HOP_BY_HOP]
+        return response.status, response_headers, data
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        logger.info(f"Asset proxy started at {self.address} (cache {self.cache.directory})")
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.cache.save()
+        logger.info(f"Asset proxy stopped: {self.summary()}")
+
+    def summary(self):
+        stats = self.stats
+        cacheable = stats["hits"] + stats["misses"]
+        ratio = stats["hits"] / cacheable if cacheable else 0.0
+        return (f"{stats['hits']} hit(s), {stats['misses']} miss(es), hit ratio {ratio:.0%}, "
+                f"{stats['bytes_saved'] / 1024:.1f} KiB saved, {stats['passed']} passed through, "
+                f"{stats['tunnels']} HTTPS tunnel(s); cache {self.cache.size / 1024:.1f} KiB "
+                f"in {len(self.cache.index)} entries")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the caching proxy for static assets")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8899)
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--max-size", type=float, default=200, help="Cache size bound in MiB")
+    parser.add_argument("--ttl", type=float, default=86400, help="Seconds a cached asset stays fresh")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+    proxy = AssetProxy(args.host, args.port, args.cache_dir, int(args.max_size * 1024 * 1024), args.ttl)
+    print(f"Asset proxy listening on {proxy.address}")
+    try:
+        proxy.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        proxy.server.server_close()
+        proxy.cache.save()
+        print(proxy.summary())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+import os
+import re
+import sys
+import json
+import math
+import time
+import argparse
+import statistics
+from datetime import datetime, timezone
+from browser_pool import BrowserPool
+from checkpoints import build_cart, build_checkout
+from forms import fill_form
+from local_shop import LocalShop
+from pages import CartPage, CategoryPage, CheckoutPage, ProductPage
+from profiles import load_profiles
+from shop_client import ShopClient, normalize_base_url, seed_cart
+from waits import wait_for, staleness_of
+
+# Performance regression benchmark: reruns selected flows many times per browser,
+# stores the durations as versioned JSON baselines and compares new runs against
+# the latest baseline of the same target and browser profile with a Mann-Whitney U test.
+#
+# Usage: python benchmark.py --flows add_to_cart,checkout --browsers chrome --runs 20 --local-shop --save
+
+BASELINE_DIR = "benchmarks"
+SCHEMA = 1
+# Run conditions a baseline must share with a run to be compared with it
+MATCHED = ("target", "browser_profile")
+BILLING = {
+    "BillingNewAddress_FirstName": "Bench",
+    "BillingNewAddress_LastName": "Mark",
+    "BillingNewAddress_Email": "benchmark@example.com",
+    "BillingNewAddress_City": "New York",
+    "BillingNewAddress_Address1": "1 Benchmark Street",
+    "BillingNewAddress_ZipPostalCode": "10001",
+    "BillingNewAddress_PhoneNumber": "1234567890",
+    "BillingNewAddress_CountryId": "United States",
+}
+
+
+# Flows: each one runs a user journey on a clean driver. Lookups a flow needs are made
+# once by its setup (base_url -> keyword arguments of the flow), outside the timing.
+
+def setup_add_to_cart(base_url):
+    _, product_path = ShopClient(base_url).first_product("books")
+    return {"product_path": product_path}
+
+
+def flow_add_to_cart(driver, base_url, product_path):
+    driver.get(base_url + product_path.lstrip("/"))
+    product = ProductPage(driver, base_url)
+    product.wait("add_to_cart", "clickable").click()
+    product.wait("notification")
+
+
+def flow_cart_update(driver, base_url):
+    seed_cart(driver, base_url)
+    cart = CartPage(driver, base_url).open()
+    cart.type("quantity", "3")
+    qty_field = cart.element("quantity")
+    cart.click("update")
+    wait_for(driver, staleness_of(qty_field), name="cart update")
+
+
+# The cart and checkout entry are the same steps the tests' checkpoint prefixes replay
+def flow_checkout(driver, base_url):
+    build_cart(driver, base_url)
+    build_checkout(driver, base_url)
+    checkout = CheckoutPage(driver, base_url)
+    fill_form(driver, BILLING)
+    checkout.click("billing_next")
+    pickup_checkbox = checkout.wait("pickup", "clickable")
+    if not pickup_checkbox.is_selected():
+        pickup_checkbox.click()
+    for name in ["shipping_next", "payment_method_next", "payment_info_next", "confirm"]:
+        checkout.wait(name, "clickable").click()
+    checkout.wait("completed")
+
+
+def flow_category_browsing(driver, base_url):
+    page = CategoryPage(driver, base_url)
+    for category in ["books", "desktops", "notebooks", "accessories", "jewelry"]:
+        driver.get(base_url + category)
+        page.wait("title")
+        page.wait("product")
+
+
+FLOWS = {
+    "add_to_cart": flow_add_to_cart,
+    "cart_update": flow_cart_update,
+    "checkout": flow_checkout,
+    "category_browsing": flow_category_browsing,
+}
+
+SETUPS = {
+    "add_to_cart": setup_add_to_cart,
+}
+
+
+# Statistics
+
+# One-sided Mann-Whitney U test (normal approximation with tie correction):
+# probability of seeing samples this much slower than the baseline by chance
+def mann_whitney_greater(new, base):
+    n1, n2 = len(new), len(base)
+    if not n1 or not n2:
+        return 1.0
+    ranked = sorted([(v, 0) for v in new] + [(v, 1) for v in base])
+    ranks = [0.0] * len(ranked)
+    ties = 0.0
+    i = 0
+    while i < len(ranked):
+        j = i
+        while j + 1 < len(ranked) and ranked[j + 1][0] == ranked[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        count = j - i + 1
+        ties += count ** 3 - count
+        i = j + 1
+    r1 = sum(rank for rank, (_, group) in zip(ranks, ranked) if group == 0)
+    u1 = r1 - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (u1 - n1 * n2 / 2 - 0.5) / math.sqrt(variance)
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def compare(new, base, threshold, alpha):
+    new_p50, base_p50 = statistics.median(new), statistics.median(base)
+    change = (new_p50 - base_p50) / base_p50 if base_p50 else 0.0
+    p_slower = mann_whitney_greater(new, base)
+    p_faster = mann_whitney_greater(base, new)
+    if change > threshold and p_slower < alpha:
+        status = "REGRESSION"
+    elif change < -threshold and p_faster < alpha:
+        status = "IMPROVED"
+    else:
+        status = "OK"
+    return {"base_p50": base_p50, "new_p50": new_p50, "change": change, "p_value": p_slower, "status": status}
+
+
+# Baselines
+
+def baseline_versions(directory):
+    versions = []
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            match = re.fullmatch(r"baseline-v(\d+)\.json", name)
+            if match:
+                versions.append(int(match.group(1)))
+    return sorted(versions)
+
+
+def load_baseline(path):
+    with open(path) as f:
+        baseline = json.load(f)
+    if baseline.get("schema") != SCHEMA:
+        raise ValueError(f"Unsupported baseline schema in {path}: {baseline.get('schema')}")
+    return baseline
+
+
+# Differences between a baseline's run conditions and this run's: ["target: ... != ..."]
+def mismatches(baseline, metadata):
+    return [f"{key}: {baseline.get(key)} != {metadata[key]}" for key in MATCHED
+            if baseline.get(key) != metadata[key]]
+
+
+# Latest baseline recorded under the same run conditions, or None
+def latest_matching_baseline(directory, metadata):
+    for version in reversed(baseline_versions(directory)):
+        baseline = load_baseline(os.path.join(directory, f"baseline-v{version}.json"))
+        if not mismatches(baseline, metadata):
+            return baseline
+    return None
+
+
+def save_baseline(directory, results, metadata):
+    os.makedirs(directory, exist_ok=True)
+    versions = baseline_versions(directory)
+    version = versions[-1] + 1 if versions else 1
+    path = os.path.join(directory, f"baseline-v{version}.json")
+    with open(path, "w") as f:
+        json.dump(dict(metadata, schema=SCHEMA, version=version, results=results), f, indent=2)
+    return path
+
+
+# Running the flows
+
+def run(flows, browsers, runs, warmup, base_url, profile):
+    results = {}
+    for browser in browsers:
+        pool = BrowserPool(browser, max_uses=runs * len(flows) + warmup * len(flows) + 1, profile=profile)
+        try:
+            for name in flows:
+                durations = []
+                kwargs = SETUPS[name](base_url) if name in SETUPS else {}
+                for i in range(warmup + runs):
+                    driver = pool.acquire()
+                    start = time.perf_counter()
+                    try:
+                        FLOWS[name](driver, base_url, **kwargs)
+                    finally:
+                        elapsed = time.perf_counter() - start
+                        pool.release(driver)
+                    if i >= warmup:
+                        durations.append(elapsed)
+                print(f"{name} [{browser}]: p50 {statistics.median(durations):.3f}s over {runs} runs")
+                results[f"{name}/{browser}"] = durations
+        finally:
+            pool.close()
+    return results
+
+
+def print_table(results, baseline, threshold, alpha):
+    print(f"\n{'flow':<20}{'browser':<10}{'base p50':>10}{'new p50':>10}{'change':>9}{'p-value':>9}  status")
+    regressions = 0
+    for key, durations in results.items():
+        flow, browser = key.split("/")
+        base = (baseline or {}).get("results", {}).get(key)
+        if not base:
+            print(f"{flow:<20}{browser:<10}{'-':>10}{statistics.median(durations):>9.3f}s{'-':>9}{'-':>9}  NEW")
+            continue
+        row = compare(durations, base, threshold, alpha)
+        regressions += row["status"] == "REGRESSION"
+        print(f"{flow:<20}{browser:<10}{row['base_p50']:>9.3f}s{row['new_p50']:>9.3f}s"
+              f"{row['change'] * 100:>8.1f}%{row['p_value']:>9.3f}  {row['status']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the suite's flows against stored baselines")
+    parser.add_argument("--flows", default=",".join(FLOWS), help=f"Comma separated flows: {', '.join(FLOWS)}")
+    parser.add_argument("--browsers", default="chrome")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2, help="Unmeasured runs per flow before measuring")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative p50 slowdown that counts as a regression")
+    parser.add_argument("--alpha", type=float, default=0.05, help="Significance level of the Mann-Whitney U test")
+    parser.add_argument("--baseline", default=None, help="Baseline file (default: latest in --baseline-dir)")
+    parser.add_argument("--baseline-dir", default=BASELINE_DIR)
+    parser.add_argument("--save", action="store_true", help="Store this run as a new baseline version")
+    parser.add_argument("--browser-profile", default="default")
+    parser.add_argument("--profile-config", default=None)
+    parser.add_argument("--base-url", default="https://demowebshop.tricentis.com/")
+    parser.add_argument("--local-shop", action="store_true", help="Benchmark against the local stand-in shop")
+    parser.add_argument("--shop-latency", type=float, default=0, help="Local shop latency in milliseconds")
+    args = parser.parse_args()
+
+    flows = args.flows.split(",")
+    unknown = [name for name in flows if name not in FLOWS]
+    if unknown:
+        parser.error(f"Unknown flow(s): {', '.join(unknown)}")
+    base_url = normalize_base_url(args.base_url)
+    target = base_url
+    if args.local_shop:
+        target = f"local-shop ({args.shop_latency:g} ms latency)" if args.shop_latency else "local-shop"
+    metadata = {"target": target, "browser_profile": args.browser_profile}
+    if args.baseline:
+        baseline = load_baseline(args.baseline)
+        if mismatches(baseline, metadata):
+            parser.error(f"Baseline {args.baseline} was recorded under other conditions "
+                         f"({'; '.join(mismatches(baseline, metadata))})")
+    else:
+        baseline = latest_matching_baseline(args.baseline_dir, metadata)
+    if baseline:
+        print(f"Comparing against baseline v{baseline['version']} ({baseline['created']})")
+    else:
+        print(f"No baseline for target {target} with profile {args.browser_profile}, nothing to compare")
+
+    profile = load_profiles(args.profile_config)[args.browser_profile]
+    shop = LocalShop(latency=args.shop_latency / 1000).start() if args.local_shop else None
+    try:
+        results = run(flows, args.browsers.split(","), args.runs, args.warmup,
+                      shop.url if shop else base_url, profile)
+    finally:
+        if shop:
+            shop.stop()
+
+    regressions = print_table(results, baseline, args.threshold, args.alpha)
+    if args.save:
+        path = save_baseline(args.baseline_dir, results, dict(
+            metadata, created=datetime.now(timezone.utc).isoformat(timespec="seconds"), runs=args.runs))
+        print(f"Saved baseline {path}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
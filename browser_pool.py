@@ -0,0 +1,130 @@
+import time
+import logging
+from selenium import webdriver
+from selenium.common.exceptions import InvalidSessionIdException, WebDriverException
+from profiles import DEFAULTS, build_options
+
+logger = logging.getLogger(__name__)
+
+
+# Starting a new WebDriver instance for the given browser and launch profile
+def launch_driver(browser, profile=None):
+    profile = profile or DEFAULTS
+    options = build_options(browser, profile)
+    if browser == "chrome":
+        drv = webdriver.Chrome(options=options)
+    elif browser == "firefox":
+        drv = webdriver.Firefox(options=options)
+    else:
+        drv = webdriver.Edge(options=options)
+    if profile["window_size"]:
+        drv.set_window_size(*profile["window_size"])
+    else:
+        drv.maximize_window()
+    return drv
+
+
+# Whether an error raised by a test means the browser session is gone (crashed, killed,
+# unreachable); subclasses such as NoSuchElementException are ordinary test failures
+def is_crash(error):
+    return isinstance(error, InvalidSessionIdException) or type(error) is WebDriverException
+
+
+# Pool of warm drivers for a single browser type.
+# Drivers are reset between tests and recycled after max_uses or a crash.
+class BrowserPool:
+    def __init__(self, browser, max_uses=20, implicit_wait=0, profile=None, launcher=launch_driver):
+        self.browser = browser
+        self.profile = profile
+        self.max_uses = max_uses
+        self.implicit_wait = implicit_wait
+        self.launcher = launcher
+        self.idle = []
+        self.uses = {}
+        self.launches = 0
+        self.launch_time = 0.0
+        self.reuses = 0
+        self.recycled = 0
+
+    def _launch(self):
+        logger.info(f"Launching a new driver for browser: {self.browser}")
+        start = time.perf_counter()
+        drv = self.launcher(self.browser, self.profile)
+        # the browser as named in the test matrix; capabilities report Edge as "msedge"
+        drv.test_browser = self.browser
+        drv.implicitly_wait(self.implicit_wait)
+        elapsed = time.perf_counter() - start
+        self.launches += 1
+        self.launch_time += elapsed
+        self.uses[id(drv)] = 0
+        logger.info(f"Driver for {self.browser} launched in {elapsed:.2f} seconds")
+        return drv
+
+    def acquire(self):
+        if self.idle:
+            drv = self.idle.pop()
+            self.reuses += 1
+            logger.info(f"Reusing a warm driver for browser: {self.browser}")
+        else:
+            drv = self._launch()
+        self.uses[id(drv)] += 1
+        return drv
+
+    def release(self, drv, crashed=False):
+        if crashed:
+            logger.info(f"Driver for {self.browser} crashed, recycling it")
+            self._discard(drv)
+            return
+        if self.uses.get(id(drv), 0) >= self.max_uses:
+            logger.info(f"Driver for {self.browser} reached {self.max_uses} uses, recycling it")
+            self._discard(drv)
+            return
+        try:
+            self.reset(drv)
+        except WebDriverException as e:
+            logger.info(f"Could not reset driver for {self.browser}, recycling it: {e}")
+            self._discard(drv)
+            return
+        self.idle.append(drv)
+
+    # Bringing a used driver back to a clean state without restarting the browser
+    def reset(self, drv):
+        handles = drv.window_handles
+        for handle in handles[1:]:
+            drv.switch_to.window(handle)
+            drv.close()
+        drv.switch_to.window(handles[0])
+        drv.delete_all_cookies()
+        if drv.current_url.startswith("http"):
+            drv.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        drv.get("about:blank")
+        drv.implicitly_wait(self.implicit_wait)
+
+    def _discard(self, drv):
+        self.recycled += 1
+        self.uses.pop(id(drv), None)
+        try:
+            drv.quit()
+        except WebDriverException as e:
+            logger.info(f"Error while quitting driver for {self.browser}: {e}")
+
+    def close(self):
+        logger.info(f"Terminating {len(self.idle)} pooled driver(s) for browser: {self.browser}")
+        while self.idle:
+            drv = self.idle.pop()
+            self.uses.pop(id(drv), None)
+            try:
+                drv.quit()
+            except WebDriverException as e:
+                logger.info(f"Error while quitting driver for {self.browser}: {e}")
+
+    # Estimated launch time avoided by reusing drivers instead of starting new ones
+    def saved_time(self):
+        if not self.launches:
+            return 0.0
+        return self.reuses * self.launch_time / self.launches
+
+    def summary(self):
+        return (f"{self.browser}: {self.launches} launch(es) in {self.launch_time:.2f}s, "
+                f"{self.reuses} reuse(s), {self.recycled} recycled, "
+                f"~{self.saved_time():.2f}s launch time saved")
@@ -0,0 +1,251 @@
+import time
+import logging
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support import expected_conditions as EC
+from pages import CartPage, CheckoutPage
+from shop_client import ShopClient, open_shop_domain, seed_cart
+from tracing import step
+from waits import wait_for_first
+
+logger = logging.getLogger(__name__)
+
+# Checkpoints of shared test prefixes. The first test that needs a prefix (e.g. "a cart
+# with one book") builds it in the browser and captures cookies, storage and URL; later
+# tests on the same browser restore that state instead of replaying the steps.
+#
+#     def test_something(driver, at_prefix):
+#         at_prefix("checkout")
+#
+# The cart and the checkout live on the server under the customer cookie, and the tests
+# using them change that state (remove the item, change the quantity, place the order).
+# Reusing the captured cookies would hand the next test whatever the previous one left
+# behind, so a prefix with a seed reproduces its server-side state over HTTP in a new
+# anonymous session on every restore; only the browser side (storage, URL) comes from the
+# checkpoint. Prefixes without a seed reuse the captured cookies, guarded by their
+# precondition (checked over HTTP). Every restore is then checked for readiness in the
+# browser; when that fails the prefix is replayed and captured again.
+
+READ_STORAGE = """
+function dump(storage) {
+    var items = {};
+    for (var i = 0; i < storage.length; i++) { items[storage.key(i)] = storage.getItem(storage.key(i)); }
+    return items;
+}
+return [dump(window.localStorage), dump(window.sessionStorage)];
+"""
+
+WRITE_STORAGE = """
+function load(storage, items) {
+    storage.clear();
+    Object.keys(items).forEach(function (key) { storage.setItem(key, items[key]); });
+}
+load(window.localStorage, arguments[0]);
+load(window.sessionStorage, arguments[1]);
+"""
+
+# Registered prefixes: name -> Prefix
+PREFIXES = {}
+
+
+class Prefix:
+    def __init__(self, name, build, parent=None, precondition=None, ready=None, seed=None):
+        self.name = name
+        self.build = build
+        self.parent = parent
+        self.precondition = precondition
+        self.ready = ready
+        self.seed = seed
+
+
+# Registering a prefix builder: build(driver, base_url) runs the steps on top of the parent prefix.
+# seed(client) puts the prefix's server-side state into a new ShopClient session (parents are
+# seeded first). precondition(client) gets a ShopClient with the captured cookies of an unseeded
+# prefix, ready(driver, base_url) runs after a restore; both return True when the checkpoint can
+# still be used.
+def prefix(name, parent=None, precondition=None, ready=None, seed=None):
+    def register(build):
+        PREFIXES[name] = Prefix(name, build, parent, precondition, ready, seed)
+        return build
+    return register
+
+
+# Seeds of a prefix and its parents, root first
+def seeds(prefix):
+    found = []
+    while prefix:
+        if prefix.seed:
+            found.insert(0, prefix.seed)
+        prefix = PREFIXES.get(prefix.parent)
+    return found
+
+
+class Checkpoint:
+    def __init__(self, name, browser, url, cookies, local_storage, session_storage, build_time):
+        self.name = name
+        self.browser = browser
+        self.url = url
+        self.cookies = cookies
+        self.local_storage = local_storage
+        self.session_storage = session_storage
+        self.build_time = build_time
+        self.created = time.monotonic()
+
+    def expired(self, max_age):
+        if time.monotonic() - self.created > max_age:
+            return True
+        now = time.time()
+        return any(cookie.get("expiry") and cookie["expiry"] <= now for cookie in self.cookies)
+
+
+# Checkpoints of the prefixes per browser: (prefix name, browser) -> Checkpoint
+class CheckpointStore:
+    def __init__(self, base_url, max_age=600, enabled=True):
+        self.base_url = base_url
+        self.max_age = max_age
+        self.enabled = enabled
+        self.checkpoints = {}
+        self.captures = 0
+        self.invalidations = 0
+        # per prefix name: how often it was reached from a checkpoint and by replaying it
+        self.restores = {}
+        self.replays = {}
+        self.saved = 0.0
+
+    def capture(self, driver, name, browser, build_time):
+        local_storage, session_storage = driver.execute_script(READ_STORAGE)
+        cookies = [{key: cookie[key] for key in ("name", "value", "path", "secure", "httpOnly", "expiry")
+                    if key in cookie} for cookie in driver.get_cookies()]
+        checkpoint = Checkpoint(name, browser, driver.current_url, cookies, local_storage, session_storage,
+                                build_time)
+        self.checkpoints[(name, browser)] = checkpoint
+        self.captures += 1
+        logger.info(f"Captured checkpoint '{name}' for {browser} at {checkpoint.url}")
+        return checkpoint
+
+    def restore(self, driver, checkpoint):
+        open_shop_domain(driver, self.base_url)
+        prefix_seeds = seeds(PREFIXES[checkpoint.name])
+        if prefix_seeds:
+            client = ShopClient(self.base_url)
+            for seed in prefix_seeds:
+                seed(client)
+            client.inject_into(driver)
+        else:
+            driver.delete_all_cookies()
+            for cookie in checkpoint.cookies:
+                driver.add_cookie(cookie)
+        driver.execute_script(WRITE_STORAGE, checkpoint.local_storage, checkpoint.session_storage)
+        driver.get(checkpoint.url)
+
+    def invalidate(self, name=None, browser=None, reason="invalidated"):
+        for key in list(self.checkpoints):
+            if (name is None or key[0] == name) and (browser is None or key[1] == browser):
+                logger.info(f"Dropping checkpoint '{key[0]}' for {key[1]}: {reason}")
+                del self.checkpoints[key]
+                self.invalidations += 1
+
+    # Whether the server still holds the state the checkpoint was captured with
+    def _holds(self, prefix, checkpoint):
+        while prefix:
+            if prefix.precondition:
+                client = ShopClient(self.base_url)
+                client.load_cookies(checkpoint.cookies)
+                if not prefix.precondition(client):
+                    return False
+            prefix = PREFIXES.get(prefix.parent)
+        return True
+
+    # Bringing the driver to the end of a prefix, from its checkpoint when it is still valid
+    def reach(self, driver, name, browser):
+        prefix = PREFIXES[name]
+        checkpoint = self.checkpoints.get((name, browser)) if self.enabled else None
+        if checkpoint:
+            if checkpoint.expired(self.max_age):
+                self.invalidate(name, browser, "expired")
+            elif not seeds(prefix) and not self._holds(prefix, checkpoint):
+                self.invalidate(name, browser, "precondition no longer holds")
+            else:
+                start = time.perf_counter()
+                self.restore(driver, checkpoint)
+                if prefix.ready is None or prefix.ready(driver, self.base_url):
+                    self.restores[name] = self.restores.get(name, 0) + 1
+                    self.saved += checkpoint.build_time - (time.perf_counter() - start)
+                    logger.info(f"Restored checkpoint '{name}' for {browser}")
+                    return checkpoint
+                self.invalidate(name, browser, "page not ready after restore")
+        self.replays[name] = self.replays.get(name, 0) + 1
+        return self.replay(driver, name, browser)
+
+    def replay(self, driver, name, browser):
+        prefix = PREFIXES[name]
+        logger.info(f"Replaying prefix '{name}' for {browser}")
+        start = time.perf_counter()
+        if prefix.parent:
+            self.reach(driver, prefix.parent, browser)
+        else:
+            # a root prefix starts from a new anonymous session
+            open_shop_domain(driver, self.base_url)
+            driver.delete_all_cookies()
+        prefix.build(driver, self.base_url)
+        build_time = time.perf_counter() - start
+        if not self.enabled:
+            return None
+        return self.capture(driver, name, browser, build_time)
+
+    # Restored vs. replayed per prefix; the saved time is the build time minus the restore time and
+    # can be negative when restoring is not cheaper than replaying
+    def summary(self):
+        rates = []
+        for name in sorted(set(self.restores) | set(self.replays)):
+            restores, replays = self.restores.get(name, 0), self.replays.get(name, 0)
+            rates.append(f"{name}: {restores} of {restores + replays} from a checkpoint "
+                         f"({restores / (restores + replays):.0%})")
+        return (f"{'; '.join(rates) or 'no prefixes reached'}; {self.captures} capture(s), "
+                f"{self.invalidations} invalidation(s), {self.saved:+.2f}s of prefix replay saved")
+
+
+# Shop prefixes used by tests2.py
+
+def one_book(client):
+    client.add_first_product("books")
+
+
+def billing_form_shown(driver, base_url):
+    checkout = CheckoutPage(driver, base_url)
+    try:
+        outcome, _ = wait_for_first(driver, {
+            "billing form": EC.visibility_of_element_located(checkout.locator("billing_first_name")),
+            "other page": lambda d: "onepagecheckout" not in d.current_url,
+        }, timeout=5, name="checkpoint ready")
+    except TimeoutException:
+        return False
+    return outcome == "billing form"
+
+
+@prefix("cart", seed=one_book)
+def build_cart(driver, base_url):
+    with step("Seeding the cart over HTTP"):
+        seed_cart(driver, base_url)
+    with step("Navigating to the cart"):
+        CartPage(driver, base_url).open()
+
+
+@prefix("checkout", parent="cart", ready=billing_form_shown)
+def build_checkout(driver, base_url):
+    cart = CartPage(driver, base_url)
+    with step("Checking the 'I agree with the terms of service' checkbox"):
+        cart.wait("terms", "clickable", timeout=5).click()
+    with step("Clicking the 'Checkout' button"):
+        cart.wait("checkout", "clickable", timeout=5).click()
+    checkout = CheckoutPage(driver, base_url)
+    with step("Checking for the Guest Checkout button"):
+        outcome, element = wait_for_first(driver, {
+            "guest button": EC.element_to_be_clickable(checkout.locator("guest")),
+            "billing form": EC.visibility_of_element_located(checkout.locator("billing_first_name")),
+        }, name="checkout entry")
+        if outcome == "guest button":
+            logger.info("Guest Checkout button found. Clicking.")
+            element.click()
+        else:
+            logger.info("Guest Checkout button not found, continuing with checkout")
+        checkout.wait("billing_first_name")
@@ -0,0 +1,356 @@
+import os
+import json
+import logging
+import pytest
+import forms
+import pages
+import waits
+import perf_metrics
+from selenium.common.exceptions import WebDriverException
+from asset_proxy import AssetProxy, CACHE_DIR
+from browser_pool import BrowserPool, is_crash
+from checkpoints import CheckpointStore
+from http_pages import HttpPages
+from login_cache import LoginCache
+from local_shop import LocalShop
+from perf_metrics import PerfBudgets
+from profiles import load_profiles
+from shop_client import normalize_base_url, seed_cart as seed_cart_over_http
+from timeouts import AdaptiveTimeouts, TIMEOUT_STORE
+from tracing import tracer, instrument, report_lines, TRACE_FILE
+
+pytest_plugins = ["scheduling"]
+
+logger = logging.getLogger(__name__)
+
+BASE_URL = "https://demowebshop.tricentis.com/"
+BROWSERS = ["chrome", "firefox", "edge"]
+# The one test account; its cart is server-side state shared by everyone logged in as it,
+# so the tests using it form one serial group and never run on two workers at once
+EMAIL = "jim_finch@gmail.com"
+PASSWORD = "qwerty"
+ACCOUNT_GROUP = "account"
+# Set by run_parallel.py; every worker process owns its pools and browser sessions
+WORKER_ID = os.environ.get("TEST_WORKER_ID", "main")
+
+pools_key = pytest.StashKey()
+login_key = pytest.StashKey()
+checkpoints_key = pytest.StashKey()
+http_pages_key = pytest.StashKey()
+asset_proxy_key = pytest.StashKey()
+crashed_key = pytest.StashKey()
+
+
+def pytest_addoption(parser):
+    parser.addoption("--pool-max-uses", type=int, default=20,
+                     help="Number of tests a pooled browser serves before it is restarted")
+    parser.addoption("--implicit-wait", type=float, default=0,
+                     help="Implicit wait in seconds; explicit waits are used when it is 0")
+    parser.addoption("--browser-profile", default="default",
+                     help="Browser launch profile: default, headless, fast or one from --profile-config")
+    parser.addoption("--profile-config", default=None,
+                     help="JSON file with additional or overridden browser launch profiles")
+    parser.addoption("--base-url", default=BASE_URL, help="URL of the shop under test")
+    parser.addoption("--local-shop", action="store_true",
+                     help="Run the tests against the bundled local stand-in of the shop")
+    parser.addoption("--shop-latency", type=float, default=0,
+                     help="Latency in milliseconds added to every local shop request")
+    parser.addoption("--login-mode", choices=["http", "ui"], default="http",
+                     help="How the cached login session is created")
+    parser.addoption("--wait-poll", type=float, default=waits.DEFAULT_POLL,
+                     help="Polling interval in seconds of the event-driven waits")
+    parser.addoption("--form-keystrokes", action="store_true",
+                     help="Fill forms with real keystrokes per field instead of one script call")
+    parser.addoption("--perf-budgets", default=None,
+                     help="JSON file with per-page performance budgets in milliseconds")
+    parser.addoption("--perf-samples", type=int, default=None,
+                     help="Number of page loads sampled per performance measurement")
+    parser.addoption("--no-checkpoints", action="store_true",
+                     help="Replay shared test prefixes in every test instead of restoring checkpoints")
+    parser.addoption("--checkpoint-max-age", type=float, default=600,
+                     help="Seconds after which a prefix checkpoint is built again")
+    parser.addoption("--no-adaptive-timeouts", action="store_true",
+                     help="Use the hard-coded wait timeouts instead of the ones learned from earlier runs")
+    parser.addoption("--timeout-store", default=TIMEOUT_STORE,
+                     help="JSON file with the recorded wait durations per wait and browser")
+    parser.addoption("--timeout-percentile", type=float, default=99,
+                     help="Percentile of the recorded durations a learned timeout is based on")
+    parser.addoption("--timeout-factor", type=float, default=3.0,
+                     help="Safety factor applied to the percentile of a learned timeout")
+    parser.addoption("--timeout-floor", type=float, default=2.0, help="Lowest learned timeout in seconds")
+    parser.addoption("--timeout-ceiling", type=float, default=10.0, help="Highest learned timeout in seconds")
+    parser.addoption("--timeout-overrides", default=None,
+                     help="JSON file with fixed timeouts in seconds per wait name, e.g. {\"CartPage.terms\": 5}")
+    parser.addoption("--asset-proxy", action="store_true",
+                     help="Route the browsers through a local proxy that caches static assets on disk")
+    parser.addoption("--asset-cache-dir", default=CACHE_DIR, help="Directory of the asset proxy's cache")
+    parser.addoption("--asset-cache-size", type=float, default=200, help="Asset cache size bound in MiB")
+    parser.addoption("--asset-cache-ttl", type=float, default=86400,
+                     help="Seconds a cached asset is served before it is fetched again")
+    parser.addoption("--trace-file", default=TRACE_FILE,
+                     help="JSONL file the traced steps are appended to ('' disables writing)")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "http_tier: read-only check run over HTTP without a browser")
+    config.addinivalue_line("markers", "covered_by_http: browser test whose checks the HTTP tier also runs; "
+                                       "deselect with -m 'not covered_by_http' to keep the browser matrix lean")
+    waits.DEFAULT_POLL = config.getoption("--wait-poll")
+    forms.KEYSTROKES = config.getoption("--form-keystrokes")
+    if config.getoption("--trace-file"):
+        tracer.open(config.getoption("--trace-file"))
+    if not config.getoption("--no-adaptive-timeouts"):
+        overrides = None
+        if config.getoption("--timeout-overrides"):
+            with open(config.getoption("--timeout-overrides")) as f:
+                overrides = json.load(f)
+        waits.adaptive = AdaptiveTimeouts(
+            config.getoption("--timeout-store"), percentile=config.getoption("--timeout-percentile"),
+            factor=config.getoption("--timeout-factor"), floor=config.getoption("--timeout-floor"),
+            ceiling=config.getoption("--timeout-ceiling"), overrides=overrides)
+
+
+# Before scheduling.py splits the tests into shards
+@pytest.hookimpl(tryfirst=True)
+def pytest_collection_modifyitems(items):
+    for item in items:
+        if "logged_in" in item.fixturenames:
+            item.add_marker(pytest.mark.serial_group(ACCOUNT_GROUP))
+
+
+# Remembering a browser crash during the test so that the driver fixture recycles the driver
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_makereport(item, call):
+    report = yield
+    if call.when == "call" and call.excinfo and is_crash(call.excinfo.value):
+        logger.info(f"Browser session lost during {item.nodeid}: {call.excinfo.typename}")
+        item.stash[crashed_key] = True
+    return report
+
+
+def pytest_unconfigure(config):
+    tracer.close()
+    if waits.adaptive:
+        waits.adaptive.save()
+
+
+# Test id and browser of the running test for the step traces
+@pytest.fixture(autouse=True)
+def trace_test(request):
+    callspec = getattr(request.node, "callspec", None)
+    tracer.begin_test(request.node.nodeid, callspec.params.get("driver") if callspec else None)
+    yield
+    tracer.end_test()
+
+
+# One headless browser of the matrix for the focused checks of the library modules (test_*.py);
+# those checks are skipped when no browser can be started
+@pytest.fixture(scope="session")
+def headless_pool():
+    profile = load_profiles()["headless"]
+    for browser in BROWSERS:
+        pool = BrowserPool(browser, profile=profile)
+        try:
+            pool.release(pool.acquire())
+        except WebDriverException as e:
+            logger.info(f"Cannot start {browser} for the focused checks: {e.msg}")
+            continue
+        yield pool
+        pool.close()
+        return
+    pytest.skip("No browser could be started")
+
+
+@pytest.fixture
+def headless_driver(request, headless_pool):
+    drv = headless_pool.acquire()
+    yield drv
+    headless_pool.release(drv, crashed=request.node.stash.get(crashed_key, False))
+
+
+# Local stand-in of the shop, started once per session when --local-shop is given
+@pytest.fixture(scope="session")
+def local_shop(request):
+    if not request.config.getoption("--local-shop"):
+        yield None
+        return
+    shop = LocalShop(latency=request.config.getoption("--shop-latency") / 1000).start()
+    yield shop
+    shop.stop()
+
+
+# The local stand-in shop for the focused checks, whatever the suite itself runs against
+@pytest.fixture(scope="session")
+def stand_in_shop(local_shop):
+    if local_shop:
+        yield local_shop
+        return
+    shop = LocalShop().start()
+    yield shop
+    shop.stop()
+
+
+@pytest.fixture(scope="session")
+def base_url(request, local_shop):
+    if local_shop:
+        return local_shop.url
+    return normalize_base_url(request.config.getoption("--base-url"))
+
+
+# Caching proxy for static assets, shared by all browsers of the session when --asset-proxy is given
+@pytest.fixture(scope="session")
+def asset_proxy(request):
+    if not request.config.getoption("--asset-proxy"):
+        yield None
+        return
+    proxy = AssetProxy(cache_dir=request.config.getoption("--asset-cache-dir"),
+                       max_bytes=int(request.config.getoption("--asset-cache-size") * 1024 * 1024),
+                       ttl=request.config.getoption("--asset-cache-ttl")).start()
+    request.config.stash[asset_proxy_key] = proxy
+    yield proxy
+    proxy.stop()
+
+
+# Session-wide pools of warm drivers, one pool per browser type
+@pytest.fixture(scope="session")
+def browser_pools(request, asset_proxy):
+    max_uses = request.config.getoption("--pool-max-uses")
+    implicit_wait = request.config.getoption("--implicit-wait")
+    profiles = load_profiles(request.config.getoption("--profile-config"))
+    name = request.config.getoption("--browser-profile")
+    if name not in profiles:
+        raise pytest.UsageError(f"Unknown browser profile: {name}")
+    logger.info(f"Using browser profile: {name}")
+    profile = dict(profiles[name], proxy=asset_proxy.address) if asset_proxy else profiles[name]
+    pools = {browser: BrowserPool(browser, max_uses=max_uses, implicit_wait=implicit_wait,
+                                  profile=profile)
+             for browser in BROWSERS}
+    request.config.stash[pools_key] = pools
+    yield pools
+    for pool in pools.values():
+        logger.info(f"Browser pool: {pool.summary()}")
+        pool.close()
+
+
+# Handing out a pooled driver for browsers: Chrome, Firefox, Edge
+@pytest.fixture(params=BROWSERS)
+def driver(request, browser_pools):
+    browser = request.param
+    pool = browser_pools[browser]
+    logger.info(f"Acquiring driver for browser: {browser} (worker {WORKER_ID})")
+    drv = instrument(pool.acquire())
+    yield drv
+    logger.info(f"Releasing driver for browser: {browser}")
+    pool.release(drv, crashed=request.node.stash.get(crashed_key, False))
+
+
+# Browser of the test's driver as named in the test matrix (chrome, firefox, edge);
+# capabilities report Edge as "msedge"
+@pytest.fixture
+def browser(request, driver):
+    return request.node.callspec.params["driver"]
+
+
+# Building the cart over HTTP and handing the session cookie to the driver,
+# so that only the behaviour under test goes through the UI
+@pytest.fixture
+def seed_cart(driver, base_url):
+    def seed(category="books", quantity=1):
+        logger.info("Seeding the cart over HTTP")
+        return seed_cart_over_http(driver, base_url, category, quantity)
+    return seed
+
+
+# One login per test session; the auth cookie is reused by every test
+@pytest.fixture(scope="session")
+def login_cache(request, base_url):
+    cache = LoginCache(base_url, EMAIL, PASSWORD, mode=request.config.getoption("--login-mode"))
+    request.config.stash[login_key] = cache
+    yield cache
+    logger.info(f"Login cache: {cache.summary()}")
+
+
+@pytest.fixture
+def logged_in(driver, login_cache):
+    logger.info("Injecting the cached login session")
+    login_cache.inject_into(driver)
+    return driver
+
+
+# Pooled HTTP client for the read-only HTTP tier
+@pytest.fixture(scope="session")
+def http_pages(request, base_url):
+    pages = HttpPages(base_url)
+    request.config.stash[http_pages_key] = pages
+    yield pages
+    logger.info(f"HTTP tier: {pages.summary()}")
+    pages.close()
+
+
+# Checkpoints of shared test prefixes, one per prefix and browser
+@pytest.fixture(scope="session")
+def checkpoints(request, base_url):
+    store = CheckpointStore(base_url, max_age=request.config.getoption("--checkpoint-max-age"),
+                            enabled=not request.config.getoption("--no-checkpoints"))
+    request.config.stash[checkpoints_key] = store
+    yield store
+    logger.info(f"Checkpoints: {store.summary()}")
+
+
+# Bringing the test's driver to the end of a named prefix: at_prefix("checkout")
+@pytest.fixture
+def at_prefix(driver, browser, checkpoints):
+    def reach(name):
+        logger.info(f"Reaching prefix '{name}'")
+        return checkpoints.reach(driver, name, browser)
+    return reach
+
+
+@pytest.fixture(scope="session")
+def perf_budgets(request):
+    return PerfBudgets.load(request.config.getoption("--perf-budgets"),
+                            request.config.getoption("--perf-samples"))
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    pools = config.stash.get(pools_key, None)
+    if pools:
+        terminalreporter.write_sep("-", "browser pool")
+        for pool in pools.values():
+            if pool.launches:
+                terminalreporter.write_line(pool.summary())
+    cache = config.stash.get(login_key, None)
+    if cache:
+        terminalreporter.write_sep("-", "login cache")
+        terminalreporter.write_line(cache.summary())
+    store = config.stash.get(checkpoints_key, None)
+    if store and store.enabled:
+        terminalreporter.write_sep("-", "checkpoints")
+        terminalreporter.write_line(store.summary())
+    pages_client = config.stash.get(http_pages_key, None)
+    if pages_client and pages_client.requests:
+        terminalreporter.write_sep("-", "http tier")
+        terminalreporter.write_line(pages_client.summary())
+    proxy = config.stash.get(asset_proxy_key, None)
+    if proxy:
+        terminalreporter.write_sep("-", "asset proxy")
+        terminalreporter.write_line(proxy.summary())
+    if waits.stats:
+        terminalreporter.write_sep("-", "waits")
+        for line in waits.summary():
+            terminalreporter.write_line(line)
+    if pages.stats["hits"] or pages.stats["misses"]:
+        terminalreporter.write_sep("-", "locator cache")
+        terminalreporter.write_line(pages.summary())
+    if waits.adaptive and waits.adaptive.summary():
+        terminalreporter.write_sep("-", "adaptive timeouts")
+        for line in waits.adaptive.summary():
+            terminalreporter.write_line(line)
+    if tracer.records:
+        terminalreporter.write_sep("-", "slowest steps")
+        for line in report_lines(tracer.records, top=10):
+            terminalreporter.write_line(line)
+    if perf_metrics.results:
+        terminalreporter.write_sep("-", "page performance")
+        for line in perf_metrics.report_lines():
+            terminalreporter.write_line(line)
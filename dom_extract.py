@@ -0,0 +1,41 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Collecting text, attributes and visibility of every matching element in one call
+EXTRACT = """
+var selector = arguments[0], names = arguments[1];
+return Array.prototype.map.call(document.querySelectorAll(selector), function (el) {
+    var style = window.getComputedStyle(el), rect = el.getBoundingClientRect();
+    var attributes = {};
+    names.forEach(function (name) { attributes[name] = el.getAttribute(name); });
+    return {
+        text: (el.innerText || '').trim(),
+        visible: style.display !== 'none' && style.visibility !== 'hidden' && rect.width > 0 && rect.height > 0,
+        attributes: attributes
+    };
+});
+"""
+
+
+# Structured data for all elements matching a CSS selector: [{text, visible, attributes}]
+def extract(driver, selector, attributes=()):
+    return driver.execute_script(EXTRACT, selector, list(attributes))
+
+
+# Converting a price label such as "$1,800.00" or "€25.00" to a float
+def parse_price(text):
+    return float(text.strip().replace("$", "").replace("€", "").replace(",", ""))
+
+
+# Parsing the prices of a whole batch; labels that cannot be parsed are logged and skipped
+def parse_prices(items):
+    prices = []
+    for item in items:
+        try:
+            price_val = parse_price(item["text"])
+            prices.append(price_val)
+            logger.info(f"Found price: {price_val}")
+        except ValueError as ex:
+            logger.info(f"Error converting price: {ex}")
+    return prices
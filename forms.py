@@ -0,0 +1,70 @@
+import logging
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait, Select
+from selenium.webdriver.support import expected_conditions as EC
+
+logger = logging.getLogger(__name__)
+
+# Typing every field with real keystrokes instead of setting values by script,
+# can be switched on with --form-keystrokes
+KEYSTROKES = False
+
+# Setting all field values in one call and firing the events the page's validation listens to.
+# Selects match an option by value or visible text, checkboxes and radios take a boolean.
+FILL = """
+var values = arguments[0], missing = [];
+Object.keys(values).forEach(function (id) {
+    var el = document.getElementById(id), value = values[id];
+    if (!el) { missing.push(id); return; }
+    if (el.tagName === 'SELECT') {
+        var option = Array.prototype.find.call(el.options, function (o) {
+            return o.value === String(value) || o.text.trim() === String(value);
+        });
+        if (!option) { missing.push(id + ' option ' + value); return; }
+        el.value = option.value;
+    } else if (el.type === 'checkbox' || el.type === 'radio') {
+        el.checked = !!value;
+    } else {
+        el.focus();
+        el.value = value;
+    }
+    ['input', 'change', 'focusout', 'blur'].forEach(function (type) {
+        el.dispatchEvent(new Event(type, {bubbles: type !== 'blur'}));
+    });
+});
+return missing;
+"""
+
+
+def _type_field(driver, field_id, value, timeout):
+    field = WebDriverWait(driver, timeout).until(EC.visibility_of_element_located((By.ID, field_id)))
+    if field.tag_name == "select":
+        select = Select(field)
+        try:
+            select.select_by_visible_text(str(value))
+        except NoSuchElementException:
+            select.select_by_value(str(value))
+    elif field.get_attribute("type") in ("checkbox", "radio"):
+        if field.is_selected() != bool(value):
+            field.click()
+    else:
+        field.clear()
+        field.send_keys(value)
+
+
+# Filling a form from a dict of field id -> value
+def fill_form(driver, values, keystrokes=None, timeout=10):
+    if keystrokes is None:
+        keystrokes = KEYSTROKES
+    if keystrokes:
+        for field_id, value in values.items():
+            logger.info(f"Filling out field {field_id} with value '{value}'")
+            _type_field(driver, field_id, value, timeout)
+        return
+    first_field = next(iter(values))
+    WebDriverWait(driver, timeout).until(EC.visibility_of_element_located((By.ID, first_field)))
+    logger.info(f"Filling out {len(values)} field(s) in one call: {', '.join(values)}")
+    missing = driver.execute_script(FILL, values)
+    if missing:
+        raise NoSuchElementException(f"Form fields not found: {', '.join(missing)}")
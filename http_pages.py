@@ -0,0 +1,188 @@
+import gzip
+import threading
+import http.client
+from html.parser import HTMLParser
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlsplit
+
+# HTTP-only tier for read-only checks: pages are fetched over pooled keep-alive
+# connections (one per worker thread) and parsed with the standard library's HTML
+# parser into a small element tree, without a browser.
+
+VOID_ELEMENTS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+                 "source", "track", "wbr"}
+SKIPPED_TEXT = {"script", "style", "noscript"}
+
+
+class Element:
+    def __init__(self, tag, attrs, parent=None):
+        self.tag = tag
+        self.attrs = {name: value or "" for name, value in attrs}
+        self.parent = parent
+        self.children = []
+
+    @property
+    def classes(self):
+        return self.attrs.get("class", "").split()
+
+    def iter(self):
+        for child in self.children:
+            if isinstance(child, Element):
+                yield child
+                yield from child.iter()
+
+    # Elements below this one by tag, class and/or id
+    def find_all(self, tag=None, cls=None, id=None):
+        return [element for element in self.iter()
+                if (tag is None or element.tag == tag)
+                and (cls is None or cls in element.classes)
+                and (id is None or element.attrs.get("id") == id)]
+
+    def find(self, tag=None, cls=None, id=None):
+        found = self.find_all(tag, cls, id)
+        return found[0] if found else None
+
+    # Text content with whitespace collapsed, close to what a browser shows
+    def text(self):
+        parts = []
+        for child in self.children:
+            if isinstance(child, Element):
+                if child.tag not in SKIPPED_TEXT:
+                    parts.append(child.text())
+            else:
+                parts.append(child)
+        return " ".join(" ".join(parts).split())
+
+
+class TreeBuilder(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Element("#document", [])
+        self.current = self.root
+
+    def handle_starttag(self, tag, attrs):
+        element = Element(tag, attrs, self.current)
+        self.current.children.append(element)
+        if tag not in VOID_ELEMENTS:
+            self.current = element
+
+    def handle_startendtag(self, tag, attrs):
+        self.current.children.append(Element(tag, attrs, self.current))
+
+    # Closing the nearest open element with this tag; stray end tags are ignored
+    def handle_endtag(self, tag):
+        element = self.current
+        while element is not self.root and element.tag != tag:
+            element = element.parent
+        if element is not self.root:
+            self.current = element.parent
+
+    def handle_data(self, data):
+        self.current.children.append(data)
+
+
+class Page:
+    def __init__(self, url, status, html):
+        self.url = url
+        self.status = status
+        builder = TreeBuilder()
+        builder.feed(html)
+        builder.close()
+        self.root = builder.root
+
+    def find_all(self, tag=None, cls=None, id=None):
+        return self.root.find_all(tag, cls, id)
+
+    def find(self, tag=None, cls=None, id=None):
+        return self.root.find(tag, cls, id)
+
+    # Absolute URL of the first link with exactly this text (like By.LINK_TEXT)
+    def link(self, text):
+        for anchor in self.find_all("a"):
+            if anchor.text() == text and anchor.attrs.get("href"):
+                return urljoin(self.url, anchor.attrs["href"])
+        return None
+
+    # Absolute URL behind an option of a select that navigates on change (e.g. the sort order)
+    def option_url(self, select_id, text):
+        select = self.find("select", id=select_id)
+        for option in select.find_all("option") if select else []:
+            if option.text() == text:
+                return urljoin(self.url, option.attrs.get("value", ""))
+        return None
+
+
+# Fetching pages concurrently; every worker thread keeps its own keep-alive connection
+class HttpPages:
+    def __init__(self, base_url, workers=8, timeout=10):
+        self.base_url = base_url.rstrip("/") + "/"
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix="http-pages")
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.connections = []
+        self.cookies = {}
+        self.requests = 0
+
+    def _connection(self, url):
+        key = (url.scheme, url.netloc)
+        pool = self.local.__dict__.setdefault("connections", {})
+        if key not in pool:
+            factory = http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+            pool[key] = factory(url.netloc, timeout=self.timeout)
+            with self.lock:
+                self.connections.append(pool[key])
+        return pool[key]
+
+    def _request(self, url):
+        parts = urlsplit(url)
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+        with self.lock:
+            cookie = "; ".join(f"{name}={value}" for name, value in self.cookies.items())
+        headers = {"Accept-Encoding": "gzip", "User-Agent": "http-pages"}
+        if cookie:
+            headers["Cookie"] = cookie
+        for attempt in range(2):
+            connection = self._connection(parts)
+            try:
+                connection.request("GET", path or "/", headers=headers)
+                response = connection.getresponse()
+                body = response.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionError, http.client.CannotSendRequest):
+                # the server closed the idle keep-alive connection; reconnect once
+                connection.close()
+                if attempt:
+                    raise
+        with self.lock:
+            self.requests += 1
+            for header in response.headers.get_all("Set-Cookie") or []:
+                name, _, value = header.split(";", 1)[0].partition("=")
+                self.cookies[name.strip()] = value.strip()
+        if response.getheader("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        return response, body
+
+    # Fetching and parsing one page, following redirects like a browser would
+    def get(self, path_or_url):
+        url = urljoin(self.base_url, path_or_url)
+        for _ in range(5):
+            response, body = self._request(url)
+            if response.status in (301, 302, 303, 307, 308) and response.getheader("Location"):
+                url = urljoin(url, response.getheader("Location"))
+                continue
+            break
+        return Page(url, response.status, body.decode("utf-8", "replace"))
+
+    # Fetching several pages at once: {path or url: Page}
+    def get_all(self, paths):
+        paths = list(dict.fromkeys(paths))
+        return dict(zip(paths, self.executor.map(self.get, paths)))
+
+    def close(self):
+        self.executor.shutdown()
+        for connection in self.connections:
+            connection.close()
+
+    def summary(self):
+        return f"{self.requests} request(s) over {len(self.connections)} pooled connection(s)"
@@ -0,0 +1,404 @@
+import os
+import re
+import ssl
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import subprocess
+from urllib.parse import urlsplit, urlencode
+from perf_metrics import percentile
+from shop_client import PRODUCT_ITEM
+
+# Load test mode: the suite's user journeys replayed as plain HTTP scenarios by many
+# concurrent asyncio virtual users. Every virtual user keeps its own cookies and one
+# keep-alive connection, picks journeys by weight and runs until the test duration ends.
+#
+# Usage: python loadtest.py --users 200 --ramp-up 20 --duration 60
+# Without --base-url the local stand-in shop is started in a separate process.
+
+CART_ITEM = re.compile(r'name="itemquantity(\d+)"')
+# Latency histogram bucket bounds in milliseconds
+BUCKETS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+BILLING = {
+    "BillingNewAddress.FirstName": "Load",
+    "BillingNewAddress.LastName": "Test",
+    "BillingNewAddress.Email": "loadtest@example.com",
+    "BillingNewAddress.CountryId": "1",
+    "BillingNewAddress.City": "New York",
+    "BillingNewAddress.Address1": "1 Load Street",
+    "BillingNewAddress.ZipPostalCode": "10001",
+    "BillingNewAddress.PhoneNumber": "1234567890",
+}
+
+
+class JourneyError(Exception):
+    pass
+
+
+# A response that is not valid HTTP/1.1; counted as a failed request like any other
+class MalformedResponse(JourneyError):
+    pass
+
+
+# Latencies per request name and per journey, in seconds
+class Recorder:
+    def __init__(self):
+        self.requests = {}
+        self.journeys = {}
+        self.errors = {}
+        self.connections = 0
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def request(self, name, elapsed, ok):
+        self.requests.setdefault(name, []).append(elapsed)
+        if not ok:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def journey(self, name, elapsed, ok):
+        self.journeys.setdefault(name, []).append(elapsed)
+        if not ok:
+            key = f"journey:{name}"
+            self.errors[key] = self.errors.get(key, 0) + 1
+
+    def elapsed(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+
+# Minimal HTTP/1.1 client on one keep-alive connection with its own cookie jar
+class VirtualClient:
+    def __init__(self, base_url, recorder, timeout=30):
+        url = urlsplit(base_url)
+        self.secure = url.scheme == "https"
+        self.host = url.hostname
+        self.port = url.port or (443 if self.secure else 80)
+        self.netloc = url.netloc
+        self.prefix = url.path.rstrip("/") + "/"
+        self.recorder = recorder
+        self.timeout = timeout
+        self.cookies = {}
+        self.reader = None
+        self.writer = None
+
+    async def _connect(self):
+        context = ssl.create_default_context() if self.secure else None
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port, ssl=context)
+        self.recorder.connections += 1
+
+    def close(self):
+        if self.writer:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    async def _read_response(self):
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed by the server")
+        parts = status_line.split()
+        if len(parts) < 2 or not parts[1].isdigit():
+            raise MalformedResponse(f"Malformed status line: {status_line[:80]!r}")
+        status = int(parts[1])
+        headers = {}
+        cookies = []
+        while True:
+            line = (await self.reader.readline()).decode("latin-1").rstrip("\r\n")
+            if not line:
+                break
+            name, separator, value = line.partition(":")
+            if not separator:
+                raise MalformedResponse(f"Malformed header line: {line[:80]!r}")
+            if name.lower() == "set-cookie":
+                cookies.append(value.strip())
+            headers[name.lower()] = value.strip()
+        if "content-length" in headers:
+            if not headers["content-length"].isdigit():
+                raise MalformedResponse(f"Malformed Content-Length: {headers['content-length'][:80]!r}")
+            body = await self.reader.readexactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            body = b""
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                if not size:
+                    await self.reader.readline()
+                    break
+                body += await self.reader.readexactly(size)
+                await self.reader.readline()
+        else:
+            body = await self.reader.read()
+            headers["connection"] = "close"
+        for cookie in cookies:
+            name, _, value = cookie.split(";", 1)[0].partition("=")
+            self.cookies[name.strip()] = value.strip()
+        return status, headers, body
+
+    # One request; a keep-alive connection closed by the server is reopened once
+    async def request(self, name, method, path, data=None, headers=None):
+        body = urlencode(data).encode() if data is not None else b""
+        lines = [f"{method} {self.prefix}{path.lstrip('/')} HTTP/1.1", f"Host: {self.netloc}",
+                 "Connection: keep-alive", "User-Agent: loadtest"]
+        if self.cookies:
+            lines.append("Cookie: " + "; ".join(f"{k}={v}" for k, v in self.cookies.items()))
+        if method == "POST":
+            lines += ["Content-Type: application/x-www-form-urlencoded", f"Content-Length: {len(body)}"]
+        for header, value in (headers or {}).items():
+            lines.append(f"{header}: {value}")
+        message = ("\r\n".join(lines) + "\r\n\r\n").encode() + body
+
+        start = time.perf_counter()
+        try:
+            for attempt in range(2):
+                reused = self.writer is not None
+                if not reused:
+                    await self._connect()
+                try:
+                    self.writer.write(message)
+                    await self.writer.drain()
+                    status, response_headers, response_body = await asyncio.wait_for(
+                        self._read_response(), self.timeout)
+                    break
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    self.close()
+                    if not reused or attempt:
+                        raise
+        except Exception:
+            self.close()
+            self.recorder.request(name, time.perf_counter() - start, False)
+            raise
+        self.recorder.request(name, time.perf_counter() - start, status < 400)
+        if response_headers.get("connection", "").lower() == "close":
+            self.close()
+        if status >= 400:
+            raise JourneyError(f"{method} {path} returned {status}")
+        return status, response_headers, response_body.decode("utf-8", "replace")
+
+
+# Journeys: the suite's flows as HTTP requests
+
+async def add_book(client):
+    _, _, html = await client.request("category page", "GET", "books")
+    match = PRODUCT_ITEM.search(html)
+    if not match:
+        raise JourneyError("No products found for category books")
+    product_id, product_path = match.group(1), match.group(2)
+    await client.request("product page", "GET", product_path)
+    _, _, body = await client.request(
+        "add to cart", "POST", f"addproducttocart/details/{product_id}/1",
+        {f"addtocart_{product_id}.EnteredQuantity": 1}, {"X-Requested-With": "XMLHttpRequest"})
+    if not json.loads(body).get("success"):
+        raise JourneyError(f"Could not add product {product_id} to the cart")
+
+
+async def browse_category(client):
+    await client.request("home page", "GET", "")
+    for category in ["books", "computers", "jewelry"]:
+        await client.request("category page", "GET", category)
+    for category in ["desktops", "notebooks", "accessories"]:
+        await client.request("sorted category page", "GET", f"{category}?orderby=10")
+
+
+async def add_to_cart(client):
+    await client.request("home page", "GET", "")
+    await add_book(client)
+    await client.request("cart page", "GET", "cart")
+
+
+async def update_quantity(client):
+    await add_book(client)
+    _, _, html = await client.request("cart page", "GET", "cart")
+    items = CART_ITEM.findall(html)
+    if not items:
+        raise JourneyError("Cart is empty after adding a product")
+    await client.request("cart update", "POST", "cart",
+                         {f"itemquantity{items[0]}": 3, "updatecart": "Update shopping cart"})
+
+
+async def guest_checkout(client):
+    await add_book(client)
+    await client.request("cart page", "GET", "cart")
+    status, headers, _ = await client.request("cart checkout", "POST", "cart",
+                                              {"termsofservice": "on", "checkout": "checkout"})
+    if status in (301, 302, 303) and "checkoutasguest" in headers.get("location", "").lower():
+        await client.request("checkout as guest", "GET", "login/checkoutasguest")
+    await client.request("checkout page", "GET", "onepagecheckout")
+    for name, path, data in [
+        ("save billing", "checkout/OpcSaveBilling", BILLING),
+        ("save shipping", "checkout/OpcSaveShipping", {"PickUpInStore": "true"}),
+        ("save payment method", "checkout/OpcSavePaymentMethod", {"paymentmethod": "Payments.CashOnDelivery"}),
+        ("save payment info", "checkout/OpcSavePaymentInfo", {}),
+        ("confirm order", "checkout/OpcConfirmOrder", {}),
+    ]:
+        _, _, body = await client.request(name, "POST", path, data, {"X-Requested-With": "XMLHttpRequest"})
+        if json.loads(body).get("error"):
+            raise JourneyError(f"{name} failed: {body}")
+    await client.request("checkout completed", "GET", "checkout/completed")
+
+
+JOURNEYS = {
+    "browse_category": browse_category,
+    "add_to_cart": add_to_cart,
+    "update_quantity": update_quantity,
+    "guest_checkout": guest_checkout,
+}
+
+DEFAULT_MIX = {"browse_category": 4, "add_to_cart": 3, "update_quantity": 2, "guest_checkout": 1}
+
+
+# Running the load
+
+async def virtual_user(index, base_url, recorder, mix, start_delay, deadline, think, rng):
+    await asyncio.sleep(start_delay)
+    names, weights = list(mix), list(mix.values())
+    client = VirtualClient(base_url, recorder)
+    try:
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            start = time.perf_counter()
+            ok = True
+            try:
+                await JOURNEYS[name](client)
+            except (JourneyError, OSError, asyncio.TimeoutError, ValueError) as ex:
+                ok = False
+                client.close()
+                # a new session after a failure, like a new visitor
+                client.cookies.clear()
+                if not recorder.errors.get(f"journey:{name}"):
+                    print(f"user {index}: {name} failed: {ex!r}", file=sys.stderr)
+            recorder.journey(name, time.perf_counter() - start, ok)
+            if think:
+                await asyncio.sleep(rng.uniform(0, 2 * think))
+    finally:
+        client.close()
+
+
+async def run_load(base_url, users, ramp_up, duration, mix, think=0.0, seed=1):
+    recorder = Recorder()
+    deadline = recorder.started + ramp_up + duration
+    rng = random.Random(seed)
+    tasks = [virtual_user(i, base_url, recorder, mix, ramp_up * i / users, deadline, think,
+                          random.Random(rng.random()))
+             for i in range(users)]
+    await asyncio.gather(*tasks)
+    recorder.finished = time.perf_counter()
+    return recorder
+
+
+# Reporting
+
+def histogram(values):
+    counts = [0] * (len(BUCKETS) + 1)
+    for value in values:
+        ms = value * 1000
+        index = next((i for i, bound in enumerate(BUCKETS) if ms <= bound), len(BUCKETS))
+        counts[index] += 1
+    return counts
+
+
+def summarize(samples, errors, elapsed):
+    ms = [value * 1000 for value in samples]
+    return {
+        "count": len(ms), "errors": errors, "rate": len(ms) / elapsed if elapsed else 0.0,
+        "p50": percentile(ms, 50), "p95": percentile(ms, 95), "p99": percentile(ms, 99), "max": max(ms),
+        "histogram": histogram(samples),
+    }
+
+
+def report(recorder):
+    elapsed = recorder.elapsed()
+    return {
+        "elapsed": elapsed,
+        "connections": recorder.connections,
+        "requests": {name: summarize(samples, recorder.errors.get(name, 0), elapsed)
+                     for name, samples in recorder.requests.items()},
+        "journeys": {name: summarize(samples, recorder.errors.get(f"journey:{name}", 0), elapsed)
+                     for name, samples in recorder.journeys.items()},
+        "buckets_ms": BUCKETS,
+    }
+
+
+def print_report(result):
+    total = sum(row["count"] for row in result["requests"].values())
+    errors = sum(row["errors"] for row in result["requests"].values())
+    journeys = sum(row["count"] for row in result["journeys"].values())
+    print(f"\n{total} requests ({errors} errors) and {journeys} journeys in {result['elapsed']:.1f}s "
+          f"over {result['connections']} connection(s): "
+          f"{total / result['elapsed']:.1f} req/s, {journeys / result['elapsed']:.1f} journeys/s")
+    labels = [f"<={bound}" for bound in BUCKETS] + [f">{BUCKETS[-1]}"]
+    for title, rows in [("request", result["requests"]), ("journey", result["journeys"])]:
+        print(f"\n{title:<22}{'count':>7}{'errors':>7}{'/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+        for name, row in sorted(rows.items()):
+            print(f"{name:<22}{row['count']:>7}{row['errors']:>7}{row['rate']:>8.1f}"
+                  f"{row['p50']:>9.1f}{row['p95']:>9.1f}{row['p99']:>9.1f}{row['max']:>9.1f}")
+        print(f"\n{title + ' histogram (ms)':<22}" + "".join(f"{label:>8}" for label in labels))
+        for name, row in sorted(rows.items()):
+            print(f"{name:<22}" + "".join(f"{count:>8}" for count in row["histogram"]))
+
+
+# The local shop in its own process, so that it does not share the GIL with the load generator
+def start_local_shop(latency_ms):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "local_shop.py")
+    process = subprocess.Popen([sys.executable, script, "--port", str(port), "--latency", str(latency_ms)],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return process, f"http://127.0.0.1:{port}/"
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("The local shop did not start")
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in JOURNEYS:
+            raise argparse.ArgumentTypeError(f"Unknown journey: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay the suite's journeys as concurrent virtual users")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--ramp-up", type=float, default=10, help="Seconds until all users are running")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of full load after the ramp-up")
+    parser.add_argument("--think", type=float, default=0, help="Mean think time between journeys in seconds")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="Journey weights, e.g. browse_category=4,guest_checkout=1")
+    parser.add_argument("--base-url", default=None, help="Shop under test (default: a local stand-in shop)")
+    parser.add_argument("--shop-latency", type=float, default=0, help="Local shop latency in milliseconds")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", default=None, help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    process = None
+    base_url = args.base_url
+    if not base_url:
+        process, base_url = start_local_shop(args.shop_latency)
+    print(f"{args.users} virtual users against {base_url}: ramp-up {args.ramp_up:.0f}s, duration {args.duration:.0f}s")
+    try:
+        recorder = asyncio.run(run_load(base_url, args.users, args.ramp_up, args.duration, args.mix,
+                                        args.think, args.seed))
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+    result = report(recorder)
+    print_report(result)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+    return 1 if any(recorder.errors.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,854 @@
+import re
+import sys
+import json
+import time
+import uuid
+import html
+import logging
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, quote
+
+logger = logging.getLogger(__name__)
+
+# Offline stand-in for https://demowebshop.tricentis.com/ that reproduces the pages,
+# element ids and CSS classes used by the test suite. Start it with the --local-shop
+# pytest option or standalone: python local_shop.py --port 8000 --latency 50
+
+USERS = {"jim_finch@gmail.com": "qwerty"}
+MAX_QUANTITY = 10000
+
+CATEGORIES = [
+    ("books", "Books", None),
+    ("computers", "Computers", None),
+    ("desktops", "Desktops", "computers"),
+    ("notebooks", "Notebooks", "computers"),
+    ("accessories", "Accessories", "computers"),
+    ("electronics", "Electronics", None),
+    ("apparel-shoes", "Apparel & Shoes", None),
+    ("digital-downloads", "Digital downloads", None),
+    ("jewelry", "Jewelry", None),
+    ("gift-cards", "Gift Cards", None),
+]
+
+# (id, slug, name, price, category)
+PRODUCTS = [
+    (13, "computing-and-internet", "Computing and Internet", 10.00, "books"),
+    (45, "fiction", "Fiction", 24.00, "books"),
+    (22, "health", "Health Book", 10.00, "books"),
+    (46, "science", "Science", 51.00, "books"),
+    (72, "build-your-cheap-own-computer", "Build your own cheap computer", 800.00, "desktops"),
+    (16, "build-your-own-computer", "Build your own computer", 1200.00, "desktops"),
+    (74, "build-your-own-expensive-computer", "Build your own expensive computer", 1800.00, "desktops"),
+    (75, "simple-computer", "Simple Computer", 800.00, "desktops"),
+    (31, "141-inch-laptop", "14.1-inch Laptop", 1590.00, "notebooks"),
+    (36, "tcp-instructor-led-training", "TCP Instructor Led Training", 120.00, "accessories"),
+    (35, "tcp-self-paced-training", "TCP Self-Paced Training", 99.00, "accessories"),
+    (34, "tcp-coaching", "TCP Coaching", 250.00, "accessories"),
+    (43, "smartphone", "Smartphone", 100.00, "electronics"),
+    (42, "used-phone", "Used phone", 5.00, "electronics"),
+    (29, "blue-jeans", "Blue Jeans", 1.00, "apparel-shoes"),
+    (5, "50s-rockabilly-polka-dot-top-jr-plus-size", "50's Rockabilly Polka Dot Top JR Plus Size", 11.00, "apparel-shoes"),
+    (52, "music-2", "Music 2", 10.00, "digital-downloads"),
+    (14, "black-white-diamond-heart", "Black & White Diamond Heart", 130.00, "jewelry"),
+    (71, "create-it-yourself-jewelry", "Create Your Own Jewelry", 100.00, "jewelry"),
+    (2, "25-virtual-gift-card", "$25 Virtual Gift Card", 25.00, "gift-cards"),
+]
+
+SORT_OPTIONS = [("0", "Position"), ("5", "Name: A to Z"), ("6", "Name: Z to A"),
+                ("10", "Price: Low to High"), ("11", "Price: High to Low"), ("15", "Created on")]
+
+COUNTRIES = [("0", "Select country"), ("1", "United States"), ("2", "Canada"), ("3", "Germany")]
+
+BILLING_FIELDS = ["FirstName", "LastName", "Email", "CountryId", "City", "Address1",
+                  "ZipPostalCode", "PhoneNumber"]
+
+# 1x1 transparent PNG used for every product picture
+PIXEL = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000001e221bc330000000049454e44ae426082"
+)
+
+STYLES = """
+body { font-family: Arial, sans-serif; margin: 0; }
+.header, .footer, .master-wrapper-content { width: 960px; margin: 0 auto; }
+.header-links li, .top-menu li, .footer li { display: inline-block; margin-right: 10px; }
+.product-grid .item-box { display: inline-block; width: 220px; vertical-align: top; }
+.bar-notification { display: none; position: fixed; top: 0; left: 0; right: 0; padding: 10px; }
+.bar-notification.success { background: #4bb07a; }
+.bar-notification.error { background: #e4444c; }
+.opc .step { display: none; }
+.opc .tab-section.active .step { display: block; }
+.message-error, .field-validation-error { color: #e4444c; }
+"""
+
+SCRIPTS = """
+function setLocation(url) { window.location.href = url; }
+function serialize(container) {
+    var parts = [];
+    Array.prototype.forEach.call(container.querySelectorAll('input, select, textarea'), function (el) {
+        if (!el.name || ((el.type === 'checkbox' || el.type === 'radio') && !el.checked)) { return; }
+        parts.push(encodeURIComponent(el.name) + '=' + encodeURIComponent(el.value));
+    });
+    return parts.join('&');
+}
+function postForm(url, data, done) {
+    var xhr = new XMLHttpRequest();
+    xhr.open('POST', url);
+    xhr.setRequestHeader('Content-Type', 'application/x-www-form-urlencoded');
+    xhr.setRequestHeader('X-Requested-With', 'XMLHttpRequest');
+    xhr.onload = function () { done(JSON.parse(xhr.responseText)); };
+    xhr.send(data);
+}
+function displayBarNotification(message, type) {
+    var bar = document.getElementById('bar-notification');
+    bar.className = 'bar-notification ' + type;
+    bar.querySelector('.content').innerHTML = message;
+    bar.style.display = 'block';
+}
+var AjaxCart = {
+    addproducttocart_catalog: function (url) { postForm(url, '', AjaxCart.success); },
+    addproducttocart_details: function (url, formselector) {
+        postForm(url, serialize(document.querySelector(formselector)), AjaxCart.success);
+    },
+    success: function (response) {
+        if (response.updatetopcartsectionhtml) {
+            document.querySelector('.cart-qty').innerHTML = response.updatetopcartsectionhtml;
+        }
+        displayBarNotification(response.message, response.success ? 'success' : 'error');
+    }
+};
+var Checkout = {
+    show: function (section) {
+        Array.prototype.forEach.call(document.querySelectorAll('.opc .tab-section'), function (el) {
+            el.className = el.id === 'opc-' + section ? 'tab-section active' : 'tab-section';
+        });
+    },
+    save: function (url, containerId) {
+        postForm(url, serialize(document.getElementById(containerId)), function (response) {
+            var errors = document.querySelector('#' + containerId + ' .message-error');
+            if (response.error) { errors.innerHTML = response.message.join('<br />'); return; }
+            errors.innerHTML = '';
+            if (response.redirect) { window.location.href = response.redirect; return; }
+            Checkout.show(response.goto_section);
+        });
+    }
+};
+var Billing = { save: function () { Checkout.save('/checkout/OpcSaveBilling/', 'co-billing-form'); } };
+var Shipping = { save: function () { Checkout.save('/checkout/OpcSaveShipping/', 'co-shipping-form'); } };
+var ShippingMethod = { save: function () { Checkout.save('/checkout/OpcSaveShippingMethod/', 'co-shipping-method-form'); } };
+var PaymentMethod = { save: function () { Checkout.save('/checkout/OpcSavePaymentMethod/', 'co-payment-method-form'); } };
+var PaymentInfo = { save: function () { Checkout.save('/checkout/OpcSavePaymentInfo/', 'co-payment-info-form'); } };
+var ConfirmOrder = { save: function () { Checkout.save('/checkout/OpcConfirmOrder/', 'confirm-order-buttons-container'); } };
+"""
+
+e = html.escape
+SELECTED = ' selected="selected"'
+CHECKED = ' checked="checked"'
+
+
+def category(slug):
+    for item in CATEGORIES:
+        if item[0] == slug:
+            return item
+    return None
+
+
+def product_by_id(product_id):
+    for item in PRODUCTS:
+        if item[0] == product_id:
+            return item
+    return None
+
+
+def product_by_slug(slug):
+    for item in PRODUCTS:
+        if item[1] == slug:
+            return item
+    return None
+
+
+def sort_products(products, orderby):
+    if orderby == "5":
+        return sorted(products, key=lambda p: p[2])
+    if orderby == "6":
+        return sorted(products, key=lambda p: p[2], reverse=True)
+    if orderby == "10":
+        return sorted(products, key=lambda p: p[3])
+    if orderby == "11":
+        return sorted(products, key=lambda p: p[3], reverse=True)
+    if orderby == "15":
+        return sorted(products, key=lambda p: p[0], reverse=True)
+    return list(products)
+
+
+# Shop state shared by all request handlers: carts, logins, reviews and orders
+class ShopState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.carts = {}
+        self.auth = {}
+        self.reviews = []
+        self.orders = []
+        self.checkouts = {}
+        self.next_item_id = 1
+
+    # Logged-in customers own a cart per account, guests a cart per customer cookie
+    def cart_key(self, customer, email):
+        return f"user:{email}" if email else f"guest:{customer}"
+
+    def add_to_cart(self, key, product_id, quantity):
+        with self.lock:
+            cart = self.carts.setdefault(key, [])
+            for item in cart:
+                if item["product_id"] == product_id:
+                    item["quantity"] += quantity
+                    return
+            cart.append({"id": self.next_item_id, "product_id": product_id, "quantity": quantity})
+            self.next_item_id += 1
+
+    def login(self, customer, email):
+        token = uuid.uuid4().hex
+        with self.lock:
+            self.auth[token] = email
+            guest_cart = self.carts.pop(f"guest:{customer}", [])
+        for item in guest_cart:
+            self.add_to_cart(f"user:{email}", item["product_id"], item["quantity"])
+        return token
+
+
+class ShopHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # headers and body are written separately; without TCP_NODELAY every keep-alive
+    # response waits for the client's delayed ACK (~40 ms)
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        logger.debug(f"Local shop: {format % args}")
+
+    @property
+    def shop(self):
+        return self.server.shop
+
+    @property
+    def state(self):
+        return self.server.shop.state
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    # Routing a request to its page handler
+    def dispatch(self, method):
+        if self.shop.latency:
+            time.sleep(self.shop.latency)
+        url = urlsplit(self.path)
+        self.query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        self.form = {}
+        self.form_raw = ""
+        if method == "POST":
+            length = int(self.headers.get("Content-Length") or 0)
+            self.form_raw = self.rfile.read(length).decode("utf-8")
+            self.form = {key: values[-1] for key, values in parse_qs(self.form_raw, keep_blank_values=True).items()}
+        self.cookies = {}
+        for part in (self.headers.get("Cookie") or "").split(";"):
+            if "=" in part:
+                name, value = part.strip().split("=", 1)
+                self.cookies[name] = value
+        self.set_cookies = []
+        self.customer = self.cookies.get("Nop.customer")
+        if not self.customer:
+            self.customer = str(uuid.uuid4())
+            self.set_cookies.append(f"Nop.customer={self.customer}; path=/; HttpOnly")
+        self.email = self.state.auth.get(self.cookies.get("NOPCOMMERCE.AUTH"))
+        self.cart_key = self.state.cart_key(self.customer, self.email)
+
+        path = url.path.rstrip("/") or "/"
+        for pattern, methods, handler in ROUTES:
+            match = re.fullmatch(pattern, path)
+            if match and method in methods:
+                return handler(self, *match.groups())
+        if method == "GET" and category(path.lstrip("/")):
+            return self.category_page(path.lstrip("/"))
+        if method == "GET" and product_by_slug(path.lstrip("/")):
+            return self.product_page(path.lstrip("/"))
+        self.send(404, self.layout("Page not found", '<div class="page"><h1>Page not found</h1></div>'))
+
+    # Responses
+
+    def send(self, status, body, content_type="text/html; charset=utf-8", headers=None):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for cookie in self.set_cookies:
+            self.send_header("Set-Cookie", cookie)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, data):
+        self.send(200, json.dumps(data), "application/json; charset=utf-8")
+
+    def redirect(self, location):
+        self.send(302, "", headers={"Location": location})
+
+    def send_static(self, body, content_type):
+        self.send(200, body, content_type, {"Cache-Control": "public, max-age=86400"})
+
+    def cart(self):
+        return self.state.carts.get(self.cart_key, [])
+
+    def layout(self, title, content):
+        cart_qty = sum(item["quantity"] for item in self.cart())
+        if self.email:
+            account = (f'<li><a href="/customer/info" class="account">{e(self.email)}</a></li>'
+                       f'<li><a href="/logout" class="ico-logout">Log out</a></li>')
+        else:
+            account = ('<li><a href="/register" class="ico-register">Register</a></li>'
+                       '<li><a href="/login" class="ico-login">Log in</a></li>')
+        menu = "".join(f'<li><a href="/{slug}">{e(name)}</a></li>'
+                       for slug, name, parent in CATEGORIES if parent is None)
+        return f"""<!DOCTYPE html>
+<html>
+<head>
+<title>Demo Web Shop. {e(title)}</title>
+<link href="/Themes/DefaultClean/Content/styles.css" rel="stylesheet" type="text/css" />
+<script src="/Scripts/public.common.js" type="text/javascript"></script>
+</head>
+<body>
+<div id="bar-notification" class="bar-notification"><p class="content"></p></div>
+<div class="master-wrapper-page">
+<div class="header">
+<div class="header-logo"><a href="/"><img src="/Themes/DefaultClean/Content/images/logo.png" alt="Tricentis Demo Web Shop" /></a></div>
+<div class="header-links-wrapper"><div class="header-links"><ul>
+{account}
+<li id="topcartlink"><a href="/cart" class="ico-cart"><span class="cart-label">Shopping cart</span>
+<span class="cart-qty">({cart_qty})</span></a></li>
+</ul></div></div>
+</div>
+<div class="header-menu"><ul class="top-menu">{menu}</ul></div>
+<div class="master-wrapper-content">
+{content}
+</div>
+<div class="footer"><div class="column my-account"><h3>My account</h3><ul>
+<li><a href="/customer/info">My account</a></li>
+<li><a href="/cart">Shopping cart</a></li>
+</ul></div></div>
+</div>
+</body>
+</html>"""
+
+    # Pages
+
+    def home_page(self):
+        boxes = "".join(self.product_box(p) for p in PRODUCTS[:6])
+        content = f"""<div class="page home-page"><div class="page-body">
+<div class="product-grid home-page-product-grid"><div class="title"><strong>Featured products</strong></div>{boxes}</div>
+</div></div>"""
+        self.send(200, self.layout("Home", content))
+
+    def product_box(self, product):
+        product_id, slug, name, price, _ = product
+        return f"""<div class="item-box"><div class="product-item" data-productid="{product_id}">
+<div class="picture"><a href="/{slug}" title="Show details for {e(name)}"><img alt="Picture of {e(name)}" src="/content/images/thumbs/{product_id:07d}_0.png" /></a></div>
+<div class="details">
+<h2 class="product-title">
+<a href="/{slug}">{e(name)}</a>
+</h2>
+<div class="add-info">
+<div class="prices"><span class="price actual-price">{price:.2f}</span></div>
+<div class="buttons"><input type="button" value="Add to cart" class="button-2 product-box-add-to-cart-button" onclick="AjaxCart.addproducttocart_catalog('/addproducttocart/catalog/{product_id}/1/1');return false;" /></div>
+</div>
+</div>
+</div></div>"""
+
+    def category_page(self, slug):
+        _, name, parent = category(slug)
+        children = [c for c in CATEGORIES if c[2] == slug]
+        navigation = "".join(f'<li><a href="/{c[0]}">{e(c[1])}</a></li>'
+                             for c in CATEGORIES if c[2] is not None and c[2] in (slug, parent))
+        if children:
+            boxes = "".join(f"""<div class="item-box"><div class="sub-category-item">
+<h2 class="title"><a href="/{c[0]}" title="Show products in category {e(c[1])}">{e(c[1])}</a></h2>
+</div></div>""" for c in children)
+            body = f'<div class="sub-category-grid">{boxes}</div>'
+        else:
+            orderby = self.query.get("orderby", "0")
+            options = "".join(
+                f'<option{SELECTED if value == orderby else ""} value="/{slug}?orderby={value}">{label}</option>'
+                for value, label in SORT_OPTIONS)
+            products = sort_products([p for p in PRODUCTS if p[4] == slug], orderby)
+            boxes = "".join(self.product_box(p) for p in products)
+            body = f"""<div class="product-selectors"><div class="product-sorting">
+<span>Sort by</span>
+<select id="products-orderby" name="products-orderby" onchange="setLocation(this.value);">{options}</select>
+</div></div>
+<div class="product-grid">{boxes}</div>"""
+        content = f"""<div class="side-2"><div class="block block-category-navigation">
+<div class="title"><strong>Categories</strong></div><div class="listbox"><ul class="list">{navigation}</ul></div>
+</div></div>
+<div class="center-2"><div class="page category-page">
+<div class="page-title"><h1>{e(name)}</h1></div>
+<div class="page-body">{body}</div>
+</div></div>"""
+        self.send(200, self.layout(name, content))
+
+    def product_page(self, slug):
+        product_id, _, name, price, _ = product_by_slug(slug)
+        content = f"""<div class="page product-details-page"><div class="page-body">
+<form action="/{slug}" id="product-details-form" method="post" onsubmit="return false;">
+<div class="product-essential">
+<div class="gallery"><div class="picture"><img alt="Picture of {e(name)}" src="/content/images/thumbs/{product_id:07d}_0.png" /></div></div>
+<div class="overview">
+<div class="product-name"><h1 itemprop="name">{e(name)}</h1></div>
+<div class="product-reviews-overview"><div class="product-review-links">
+<a href="/productreviews/{product_id}">Add your review</a>
+</div></div>
+<div class="product-price"><span itemprop="price">{price:.2f}</span></div>
+<div class="add-to-cart"><div class="add-to-cart-panel">
+<label class="qty-label" for="addtocart_{product_id}_EnteredQuantity">Qty:</label>
+<input class="qty-input" id="addtocart_{product_id}_EnteredQuantity" name="addtocart_{product_id}.EnteredQuantity" type="text" value="1" />
+<input type="button" id="add-to-cart-button-{product_id}" class="button-1 add-to-cart-button" value="Add to cart" data-productid="{product_id}" onclick="AjaxCart.addproducttocart_details('/addproducttocart/details/{product_id}/1', '#product-details-form');return false;" />
+</div></div>
+</div>
+</div>
+</form>
+</div></div>"""
+        self.send(200, self.layout(name, content))
+
+    def add_to_cart_catalog(self, product_id, cart_type, quantity):
+        self.add_to_cart(int(product_id), int(quantity))
+
+    def add_to_cart_details(self, product_id, cart_type):
+        value = self.form.get(f"addtocart_{product_id}.EnteredQuantity", "1")
+        try:
+            quantity = int(value)
+        except ValueError:
+            quantity = 0
+        self.add_to_cart(int(product_id), quantity)
+
+    def add_to_cart(self, product_id, quantity):
+        if product_by_id(product_id) is None:
+            return self.send_json({"success": False, "message": "No product found with the specified ID"})
+        if quantity <= 0:
+            return self.send_json({"success": False, "message": ["Quantity should be positive"]})
+        if quantity > MAX_QUANTITY:
+            return self.send_json({"success": False,
+                                   "message": [f"The maximum quantity allowed for purchase is {MAX_QUANTITY}."]})
+        self.state.add_to_cart(self.cart_key, product_id, quantity)
+        cart_qty = sum(item["quantity"] for item in self.cart())
+        self.send_json({
+            "success": True,
+            "message": 'The product has been added to your <a href="/cart">shopping cart</a>',
+            "updatetopcartsectionhtml": f"({cart_qty})",
+        })
+
+    def cart_page(self, warnings=None):
+        warnings = warnings or {}
+        cart = self.cart()
+        if not cart:
+            content = """<div class="page shopping-cart-page"><div class="page-title"><h1>Shopping cart</h1></div>
+<div class="page-body"><div class="order-summary-content">
+Your Shopping Cart is empty!
+</div></div></div>"""
+            return self.send(200, self.layout("Shopping Cart", content))
+        rows = []
+        total = 0.0
+        for item in cart:
+            product_id, slug, name, price, _ = product_by_id(item["product_id"])
+            subtotal = price * item["quantity"]
+            total += subtotal
+            warning = warnings.get(item["id"])
+            warning_html = f'<div class="message-error"><ul><li>{e(warning)}</li></ul></div>' if warning else ""
+            rows.append(f"""<tr class="cart-item-row">
+<td class="remove-from-cart"><input type="checkbox" name="removefromcart" value="{item['id']}" /></td>
+<td class="product-picture"><img alt="Picture of {e(name)}" src="/content/images/thumbs/{product_id:07d}_0.png" /></td>
+<td class="product"><a href="/{slug}" class="product-name">{e(name)}</a>{warning_html}</td>
+<td class="unit-price nobr"><span class="product-unit-price">{price:.2f}</span></td>
+<td class="qty nobr"><input name="itemquantity{item['id']}" type="text" value="{item['quantity']}" class="qty-input" /></td>
+<td class="subtotal nobr end"><span class="product-subtotal">{subtotal:.2f}</span></td>
+</tr>""")
+        content = f"""<div class="page shopping-cart-page"><div class="page-title"><h1>Shopping cart</h1></div>
+<div class="page-body"><div class="order-summary-content">
+<form action="/cart" enctype="multipart/form-data" method="post">
+<table class="cart">
+<thead><tr class="cart-header-row"><th>Remove</th><th>Image</th><th>Product(s)</th><th>Price</th><th>Qty.</th><th>Total</th></tr></thead>
+<tbody>{"".join(rows)}</tbody>
+</table>
+<div class="cart-options"><div class="common-buttons">
+<input type="submit" name="updatecart" value="Update shopping cart" class="button-2 update-cart-button" />
+<input type="submit" name="continueshopping" value="Continue shopping" class="button-2 continue-shopping-button" />
+</div></div>
+<div class="cart-footer"><div class="totals">
+<div class="total-info"><span class="product-price order-total">{total:.2f}</span></div>
+<div id="terms-of-service-warning-box" class="terms-of-service-warning-box" style="display:none"><p>Please accept the terms of service before the next step.</p></div>
+<div class="terms-of-service">
+<input id="termsofservice" type="checkbox" name="termsofservice" />
+<label for="termsofservice">I agree with the terms of service and I adhere to them unconditionally</label>
+</div>
+<div class="checkout-buttons">
+<button type="submit" id="checkout" name="checkout" value="checkout" class="button-1 checkout-button" onclick="if (!document.getElementById('termsofservice').checked) {{ document.getElementById('terms-of-service-warning-box').style.display = 'block'; return false; }}">Checkout</button>
+</div>
+</div></div>
+</form>
+</div></div></div>"""
+        self.send(200, self.layout("Shopping Cart", content))
+
+    # Cart form: remove selected items, update quantities or go to checkout
+    def cart_post(self):
+        content_type = self.headers.get("Content-Type", "")
+        if content_type.startswith("multipart/form-data"):
+            fields = parse_multipart(self.form_raw, content_type)
+        else:
+            fields = {key: [value] for key, value in self.form.items()}
+        if "checkout" in fields:
+            if self.email:
+                return self.redirect("/onepagecheckout")
+            return self.redirect("/login/checkoutasguest?returnUrl=%2Fcart")
+        removed = {int(value) for value in fields.get("removefromcart", []) if value.isdigit()}
+        warnings = {}
+        with self.state.lock:
+            cart = self.state.carts.get(self.cart_key, [])
+            for item in list(cart):
+                if item["id"] in removed:
+                    cart.remove(item)
+                    continue
+                value = (fields.get(f"itemquantity{item['id']}") or [str(item["quantity"])])[0]
+                try:
+                    quantity = int(value)
+                except ValueError:
+                    continue
+                if quantity <= 0:
+                    cart.remove(item)
+                elif quantity > MAX_QUANTITY:
+                    warnings[item["id"]] = f"The maximum quantity allowed for purchase is {MAX_QUANTITY}."
+                else:
+                    item["quantity"] = quantity
+        self.cart_page(warnings)
+
+    def login_page(self, error=None):
+        error_html = f'<div class="message-error validation-summary-errors"><span>{e(error)}</span></div>' if error else ""
+        content = f"""<div class="page login-page"><div class="page-title"><h1>Welcome, Please Sign In!</h1></div>
+<div class="page-body"><div class="returning-wrapper">
+<form action="/login{'?' + self.path.split('?', 1)[1] if '?' in self.path else ''}" method="post">
+{error_html}
+<div class="form-fields">
+<div class="inputs"><label for="Email">Email:</label><input class="email" id="Email" name="Email" type="text" value="" /></div>
+<div class="inputs"><label for="Password">Password:</label><input class="password" id="Password" name="Password" type="password" /></div>
+<div class="inputs reversed"><input id="RememberMe" name="RememberMe" type="checkbox" value="true" /><label for="RememberMe">Remember me?</label></div>
+</div>
+<div class="buttons"><input class="button-1 login-button" type="submit" value="Log in" /></div>
+</form>
+</div></div></div>"""
+        self.send(200, self.layout("Login", content))
+
+    def login_post(self):
+        email = self.form.get("Email", "").strip()
+        if USERS.get(email) != self.form.get("Password"):
+            return self.login_page("Login was unsuccessful. Please correct the errors and try again.")
+        token = self.state.login(self.customer, email)
+        self.set_cookies.append(f"NOPCOMMERCE.AUTH={token}; path=/; HttpOnly")
+        self.redirect(self.query.get("ReturnUrl", "/"))
+
+    def logout(self):
+        with self.state.lock:
+            self.state.auth.pop(self.cookies.get("NOPCOMMERCE.AUTH"), None)
+        self.set_cookies.append("NOPCOMMERCE.AUTH=; path=/; expires=Thu, 01 Jan 1970 00:00:00 GMT")
+        self.redirect("/")
+
+    def customer_info(self):
+        if not self.email:
+            return self.redirect(f"/login?ReturnUrl={quote('/customer/info', safe='')}")
+        content = f"""<div class="page account-page customer-info-page"><div class="page-title"><h1>My account - Customer info</h1></div>
+<div class="page-body"><div class="inputs"><label for="Email">Email:</label><input id="Email" name="Email" type="text" value="{e(self.email)}" /></div></div></div>"""
+        self.send(200, self.layout("Account", content))
+
+    def reviews_page(self, product_id, result=None):
+        product = product_by_id(int(product_id))
+        if product is None:
+            return self.send(404, self.layout("Page not found", '<div class="page"><h1>Page not found</h1></div>'))
+        if result:
+            result_html = f'<div class="result">{e(result)}</div>'
+        elif not self.email:
+            result_html = '<div class="message-error validation-summary-errors"><ul><li>Only registered users can write reviews</li></ul></div>'
+        else:
+            result_html = ""
+        ratings = "".join(
+            f'<input id="addproductrating_{value}" name="AddProductReview.Rating" type="radio" value="{value}"'
+            f'{CHECKED if value == 5 else ""} />' for value in range(1, 6))
+        content = f"""<div class="page product-reviews-page"><div class="page-title"><h1>Product reviews for <a href="/{product[1]}">{e(product[2])}</a></h1></div>
+<div class="page-body">
+<div class="write-review" id="review-form">
+<div class="title"><strong>Write your own review</strong></div>
+<form action="/productreviews/{product_id}" method="post">
+{result_html}
+<div class="form-fields">
+<div class="inputs"><label for="AddProductReview_Title">Review title:</label><input class="review-title" id="AddProductReview_Title" name="AddProductReview.Title" type="text" value="" /></div>
+<div class="inputs"><label for="AddProductReview_ReviewText">Review text:</label><textarea class="review-text" id="AddProductReview_ReviewText" name="AddProductReview.ReviewText"></textarea></div>
+<div class="review-rating"><label>Rating:</label><ul><li class="label first">Bad</li><li class="rating-options">{ratings}</li><li class="label last">Excellent</li></ul></div>
+</div>
+<div class="buttons"><input type="submit" name="add-review" class="button-1 write-product-review-button" value="Submit review" /></div>
+</form>
+</div>
+</div></div>"""
+        self.send(200, self.layout("Product reviews", content))
+
+    def reviews_post(self, product_id):
+        if not self.email:
+            return self.reviews_page(product_id)
+        title = self.form.get("AddProductReview.Title", "").strip()
+        text = self.form.get("AddProductReview.ReviewText", "").strip()
+        if not title or not text:
+            return self.reviews_page(product_id)
+        with self.state.lock:
+            self.state.reviews.append({"product_id": int(product_id), "email": self.email, "title": title,
+                                       "text": text, "rating": self.form.get("AddProductReview.Rating")})
+        self.reviews_page(product_id, "Product review is successfully added.")
+
+    def checkout_as_guest(self):
+        content = """<div class="page login-page checkout-as-guest-or-register-block"><div class="page-title"><h1>Welcome, Please Sign In!</h1></div>
+<div class="page-body"><div class="new-wrapper checkout-as-guest-or-register-block">
+<div class="title"><strong>Checkout as a guest or register</strong></div>
+<div class="buttons">
+<input type="button" class="button-1 checkout-as-guest-button" onclick="location.href='/onepagecheckout'" value="Checkout as Guest" />
+<input type="button" class="button-1 register-button" onclick="location.href='/register'" value="Register" />
+</div>
+</div></div></div>"""
+        self.send(200, self.layout("Login", content))
+
+    def one_page_checkout(self):
+        if not self.cart():
+            return self.redirect("/cart")
+        countries = "".join(f'<option value="{value}">{e(label)}</option>' for value, label in COUNTRIES)
+
+        def field(name, label):
+            return (f'<div class="inputs"><label for="BillingNewAddress_{name}">{label}:</label>'
+                    f'<input id="BillingNewAddress_{name}" name="BillingNewAddress.{name}" type="text" value="" /></div>')
+
+        content = f"""<div class="page checkout-page"><div class="page-title"><h1>Checkout</h1></div>
+<div class="page-body checkout-data">
+<ol class="opc" id="checkout-steps">
+<li id="opc-billing" class="tab-section active">
+<div class="step-title"><h2>Billing address</h2></div>
+<div id="checkout-step-billing" class="step a-item"><div id="co-billing-form">
+<div class="message-error"></div>
+<div class="enter-address"><div class="edit-address">
+{field("FirstName", "First name")}
+{field("LastName", "Last name")}
+{field("Email", "Email")}
+{field("Company", "Company")}
+<div class="inputs"><label for="BillingNewAddress_CountryId">Country:</label><select id="BillingNewAddress_CountryId" name="BillingNewAddress.CountryId">{countries}</select></div>
+{field("City", "City")}
+{field("Address1", "Address 1")}
+{field("ZipPostalCode", "Zip / postal code")}
+{field("PhoneNumber", "Phone number")}
+</div></div>
+<div class="buttons" id="billing-buttons-container"><input type="button" title="Continue" class="button-1 new-address-next-step-button" onclick="Billing.save()" value="Continue" /></div>
+</div></div>
+</li>
+<li id="opc-shipping" class="tab-section">
+<div class="step-title"><h2>Shipping address</h2></div>
+<div id="checkout-step-shipping" class="step a-item"><div id="co-shipping-form">
+<div class="message-error"></div>
+<div class="pickup-in-store"><input id="PickUpInStore" name="PickUpInStore" type="checkbox" value="true" /><label for="PickUpInStore">In-Store Pickup</label></div>
+<div class="buttons" id="shipping-buttons-container"><input type="button" title="Continue" class="button-1 new-address-next-step-button" onclick="Shipping.save()" value="Continue" /></div>
+</div></div>
+</li>
+<li id="opc-shipping_method" class="tab-section">
+<div class="step-title"><h2>Shipping method</h2></div>
+<div id="checkout-step-shipping-method" class="step a-item"><div id="co-shipping-method-form">
+<div class="message-error"></div>
+<ul class="method-list"><li><input id="shippingoption_0" type="radio" name="shippingoption" value="Ground" checked="checked" /><label for="shippingoption_0">Ground (0.00)</label></li></ul>
+<div class="buttons" id="shipping-method-buttons-container"><input type="button" class="button-1 shipping-method-next-step-button" onclick="ShippingMethod.save()" value="Continue" /></div>
+</div></div>
+</li>
+<li id="opc-payment_method" class="tab-section">
+<div class="step-title"><h2>Payment method</h2></div>
+<div id="checkout-step-payment-method" class="step a-item"><div id="co-payment-method-form">
+<div class="message-error"></div>
+<ul class="method-list"><li><input id="paymentmethod_0" type="radio" name="paymentmethod" value="Payments.CashOnDelivery" checked="checked" /><label for="paymentmethod_0">Cash On Delivery (COD) (7.00)</label></li></ul>
+<div class="buttons" id="payment-method-buttons-container"><input type="button" class="button-1 payment-method-next-step-button" onclick="PaymentMethod.save()" value="Continue" /></div>
+</div></div>
+</li>
+<li id="opc-payment_info" class="tab-section">
+<div class="step-title"><h2>Payment information</h2></div>
+<div id="checkout-step-payment-info" class="step a-item"><div id="co-payment-info-form">
+<div class="message-error"></div>
+<div class="info"><p>You will pay by COD</p></div>
+<div class="buttons" id="payment-info-buttons-container"><input type="button" class="button-1 payment-info-next-step-button" onclick="PaymentInfo.save()" value="Continue" /></div>
+</div></div>
+</li>
+<li id="opc-confirm_order" class="tab-section">
+<div class="step-title"><h2>Confirm order</h2></div>
+<div id="checkout-step-confirm-order" class="step a-item"><div id="confirm-order-buttons-container">
+<div class="message-error"></div>
+<div class="buttons"><input type="button" value="Confirm" class="button-1 confirm-order-next-step-button" onclick="ConfirmOrder.save()" /></div>
+</div></div>
+</li>
+</ol>
+</div></div>"""
+        self.send(200, self.layout("Checkout", content))
+
+    def checkout_state(self):
+        with self.state.lock:
+            return self.state.checkouts.setdefault(self.cart_key, {})
+
+    def save_billing(self):
+        values = {name: self.form.get(f"BillingNewAddress.{name}", "").strip() for name in BILLING_FIELDS}
+        errors = [f"{name} is required." for name, value in values.items() if not value]
+        if values["CountryId"] == "0" and "CountryId is required." not in errors:
+            errors.append("Country is required.")
+        if errors:
+            return self.send_json({"error": 1, "message": errors})
+        self.checkout_state()["billing"] = values
+        self.send_json({"goto_section": "shipping"})
+
+    def save_shipping(self):
+        pickup = self.form.get("PickUpInStore") == "true"
+        self.checkout_state()["pickup"] = pickup
+        self.send_json({"goto_section": "payment_method" if pickup else "shipping_method"})
+
+    def save_shipping_method(self):
+        self.checkout_state()["shipping_method"] = self.form.get("shippingoption", "Ground")
+        self.send_json({"goto_section": "payment_method"})
+
+    def save_payment_method(self):
+        self.checkout_state()["payment_method"] = self.form.get("paymentmethod", "Payments.CashOnDelivery")
+        self.send_json({"goto_section": "payment_info"})
+
+    def save_payment_info(self):
+        self.send_json({"goto_section": "confirm_order"})
+
+    def confirm_order(self):
+        checkout = self.checkout_state()
+        if "billing" not in checkout or not self.cart():
+            return self.send_json({"error": 1, "message": ["Your shopping cart is empty or the billing address is missing."]})
+        with self.state.lock:
+            order_id = len(self.state.orders) + 1
+            self.state.orders.append({"id": order_id, "items": self.state.carts.pop(self.cart_key, []),
+                                      "checkout": dict(checkout)})
+            self.state.checkouts.pop(self.cart_key, None)
+        self.send_json({"success": 1, "redirect": "/checkout/completed/"})
+
+    def checkout_completed(self):
+        order_id = len(self.state.orders)
+        content = f"""<div class="page checkout-page"><div class="page-title"><h1>Thank you</h1></div>
+<div class="page-body checkout-data"><div class="section order-completed">
+<div class="title"><strong>Your order has been successfully processed!</strong></div>
+<ul class="details"><li>Order number: {order_id}</li></ul>
+<div class="buttons"><input type="button" value="Continue" class="button-2 order-completed-continue-button" onclick="setLocation('/')" /></div>
+</div></div></div>"""
+        self.send(200, self.layout("Checkout", content))
+
+    def favicon(self):
+        self.send_static(PIXEL, "image/x-icon")
+
+    def picture(self, name):
+        self.send_static(PIXEL, "image/png")
+
+    def styles(self):
+        self.send_static(STYLES, "text/css")
+
+    def scripts(self):
+        self.send_static(SCRIPTS, "application/javascript")
+
+
+# Reading the fields of a multipart/form-data body into name -> [values]
+def parse_multipart(body, content_type):
+    boundary = content_type.split("boundary=", 1)[1].strip('"')
+    fields = {}
+    for part in body.split(f"--{boundary}"):
+        if "\r\n\r\n" not in part:
+            continue
+        head, value = part.split("\r\n\r\n", 1)
+        name = re.search(r'name="([^"]*)"', head)
+        if name:
+            fields.setdefault(name.group(1), []).append(value.rstrip("\r\n"))
+    return fields
+
+
+ROUTES = [
+    (r"/", ("GET",), ShopHandler.home_page),
+    (r"/favicon\.ico", ("GET",), ShopHandler.favicon),
+    (r"/content/images/thumbs/([\w.]+)", ("GET",), ShopHandler.picture),
+    (r"/Themes/DefaultClean/Content/images/([\w.]+)", ("GET",), ShopHandler.picture),
+    (r"/Themes/DefaultClean/Content/styles\.css", ("GET",), ShopHandler.styles),
+    (r"/Scripts/public\.common\.js", ("GET",), ShopHandler.scripts),
+    (r"/addproducttocart/catalog/(\d+)/(\d+)/(\d+)", ("POST",), ShopHandler.add_to_cart_catalog),
+    (r"/addproducttocart/details/(\d+)/(\d+)", ("POST",), ShopHandler.add_to_cart_details),
+    (r"/cart", ("GET",), ShopHandler.cart_page),
+    (r"/cart", ("POST",), ShopHandler.cart_post),
+    (r"/login", ("GET",), ShopHandler.login_page),
+    (r"/login", ("POST",), ShopHandler.login_post),
+    (r"/logout", ("GET",), ShopHandler.logout),
+    (r"/customer/info", ("GET",), ShopHandler.customer_info),
+    (r"/productreviews/(\d+)", ("GET",), ShopHandler.reviews_page),
+    (r"/productreviews/(\d+)", ("POST",), ShopHandler.reviews_post),
+    (r"/login/checkoutasguest", ("GET",), ShopHandler.checkout_as_guest),
+    (r"/onepagecheckout", ("GET",), ShopHandler.one_page_checkout),
+    (r"/checkout/OpcSaveBilling", ("POST",), ShopHandler.save_billing),
+    (r"/checkout/OpcSaveShipping", ("POST",), ShopHandler.save_shipping),
+    (r"/checkout/OpcSaveShippingMethod", ("POST",), ShopHandler.save_shipping_method),
+    (r"/checkout/OpcSavePaymentMethod", ("POST",), ShopHandler.save_payment_method),
+    (r"/checkout/OpcSavePaymentInfo", ("POST",), ShopHandler.save_payment_info),
+    (r"/checkout/OpcConfirmOrder", ("POST",), ShopHandler.confirm_order),
+    (r"/checkout/completed", ("GET",), ShopHandler.checkout_completed),
+]
+
+
+class ShopServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # load tests open hundreds of connections at once
+    request_queue_size = 512
+
+
+# Local shop server running in a background thread
+class LocalShop:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0):
+        self.latency = latency
+        self.state = ShopState()
+        self.server = ShopServer((host, port), ShopHandler)
+        self.server.shop = self
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        logger.info(f"Local shop started at {self.url} (latency {self.latency * 1000:.0f} ms)")
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        logger.info("Local shop stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the local stand-in of the demo web shop")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0, help="Added latency per request in milliseconds")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+    shop = LocalShop(args.host, args.port, args.latency / 1000)
+    print(f"Serving the local shop at {shop.url}")
+    try:
+        shop.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+import re
+import time
+import logging
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from shop_client import ShopClient, open_shop_domain
+
+logger = logging.getLogger(__name__)
+
+VERIFICATION_TOKEN = re.compile(r'name="__RequestVerificationToken" type="hidden" value="([^"]+)"')
+
+
+# Authenticating once per test session and handing the auth cookie to every
+# test that needs a logged-in user. The session is re-checked over HTTP at most
+# every check_interval seconds and refreshed when it has expired.
+class LoginCache:
+    def __init__(self, base_url, email, password, mode="http", check_interval=60):
+        self.base_url = base_url
+        self.email = email
+        self.password = password
+        self.mode = mode
+        self.check_interval = check_interval
+        self.client = None
+        self.checked_at = 0.0
+        self.logins = 0
+        self.hits = 0
+
+    def login_over_http(self):
+        logger.info(f"Logging in over HTTP as {self.email}")
+        client = ShopClient(self.base_url)
+        _, html = client.get("login")
+        data = {"Email": self.email, "Password": self.password, "RememberMe": "false"}
+        token = VERIFICATION_TOKEN.search(html)
+        if token:
+            data["__RequestVerificationToken"] = token.group(1)
+        client.post("login", data)
+        return client
+
+    def login_through_ui(self, driver):
+        logger.info(f"Logging in through the UI as {self.email}")
+        driver.get(self.base_url)
+        WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.LINK_TEXT, "Log in"))).click()
+        WebDriverWait(driver, 10).until(EC.visibility_of_element_located((By.ID, "Email"))).send_keys(self.email)
+        driver.find_element(By.ID, "Password").send_keys(self.password)
+        driver.find_element(By.CSS_SELECTOR, "input.button-1.login-button").click()
+        WebDriverWait(driver, 10).until(EC.visibility_of_element_located((By.LINK_TEXT, "Log out")))
+        client = ShopClient(self.base_url)
+        client.load_cookies_from(driver)
+        return client
+
+    # The customer info page redirects to the login page for anonymous users
+    def is_valid(self):
+        if self.client is None:
+            return False
+        if any(cookie.is_expired() for cookie in self.client.cookies):
+            return False
+        if time.monotonic() - self.checked_at < self.check_interval:
+            return True
+        url, html = self.client.get("customer/info")
+        self.checked_at = time.monotonic()
+        return "login" not in url.lower() and "Log out" in html
+
+    def invalidate(self):
+        logger.info("Invalidating the cached login session")
+        self.client = None
+
+    def refresh(self, driver=None):
+        if self.mode == "ui" and driver is not None:
+            client = self.login_through_ui(driver)
+        else:
+            client = self.login_over_http()
+        self.client = client
+        self.checked_at = 0.0
+        self.logins += 1
+        if not self.is_valid():
+            self.client = None
+            raise AssertionError(f"Login failed for {self.email}")
+
+    # Putting the cached auth cookie into the driver, logging in again if needed
+    def inject_into(self, driver):
+        if self.is_valid():
+            self.hits += 1
+            logger.info("Reusing the cached login session")
+        else:
+            logger.info("No valid cached login session, authenticating")
+            self.refresh(driver)
+        open_shop_domain(driver, self.base_url)
+        self.client.inject_into(driver)
+
+    def summary(self):
+        return f"{self.logins} login(s), {self.hits} cached session reuse(s)"
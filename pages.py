@@ -0,0 +1,250 @@
+import logging
+from selenium.common.exceptions import StaleElementReferenceException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.webelement import WebElement
+from selenium.webdriver.support import expected_conditions as EC
+from waits import wait_for
+
+logger = logging.getLogger(__name__)
+
+# Page objects of the shop with named locators. Resolved element handles are cached
+# per page load and reused until the driver navigates or a handle turns out to be stale.
+#
+#     cart = CartPage(driver, base_url).open()
+#     cart.type("quantity", "3")
+#     cart.click("update")
+
+# Commands that replace the current document; handles found before them are dropped
+NAVIGATION = {
+    Command.GET, Command.REFRESH, Command.GO_BACK, Command.GO_FORWARD, Command.CLOSE,
+    Command.NEW_WINDOW, Command.SWITCH_TO_WINDOW, Command.SWITCH_TO_FRAME, Command.SWITCH_TO_PARENT_FRAME,
+}
+
+# Lookups of this run, shown in the terminal summary
+stats = {"hits": 0, "misses": 0, "stale": 0, "invalidations": 0}
+
+
+# Element handles of the current document of one driver: locator -> WebElement
+class LocatorCache:
+    def __init__(self):
+        self.elements = {}
+
+    def get(self, locator):
+        element = self.elements.get(locator)
+        stats["hits" if element is not None else "misses"] += 1
+        return element
+
+    def peek(self, locator):
+        return self.elements.get(locator)
+
+    def put(self, locator, element):
+        self.elements[locator] = element
+
+    def drop(self, locator):
+        self.elements.pop(locator, None)
+
+    def clear(self):
+        if self.elements:
+            stats["invalidations"] += 1
+            self.elements.clear()
+
+
+# The locator cache of a driver, installed on first use.
+# Every command goes through execute(), so navigation is seen wherever it comes from.
+def locator_cache(driver):
+    cache = getattr(driver, "_locator_cache", None)
+    if cache is not None:
+        return cache
+    cache = LocatorCache()
+    execute = driver.execute
+
+    def caching_execute(driver_command, params=None):
+        if driver_command in NAVIGATION:
+            cache.clear()
+        return execute(driver_command, params)
+
+    driver.execute = caching_execute
+    driver._locator_cache = cache
+    return cache
+
+
+def _visible(target):
+    if isinstance(target, WebElement):
+        return EC.visibility_of(target)
+    return EC.visibility_of_element_located(target)
+
+
+def _present(target):
+    if isinstance(target, WebElement):
+        def attached(driver):
+            target.tag_name  # raises StaleElementReferenceException once the element is detached
+            return target
+        return attached
+    return EC.presence_of_element_located(target)
+
+
+CONDITIONS = {
+    "visible": _visible,
+    "clickable": EC.element_to_be_clickable,
+    "present": _present,
+}
+
+
+class Page:
+    PATH = None
+    LOCATORS = {}
+
+    def __init__(self, driver, base_url=None):
+        self.driver = driver
+        self.base_url = base_url
+        self.cache = locator_cache(driver)
+
+    def open(self):
+        self.driver.get(self.base_url + self.PATH)
+        return self
+
+    # A locator by name, or a (By, value) tuple passed through as is
+    def locator(self, name):
+        if isinstance(name, tuple):
+            return name
+        return self.LOCATORS[name]
+
+    # Element handle of a named locator, reused until the page changes
+    def element(self, name):
+        locator = self.locator(name)
+        element = self.cache.get(locator)
+        if element is None:
+            element = self.driver.find_element(*locator)
+            self.cache.put(locator, element)
+        return element
+
+    # Lists are not cached, their length changes with the page content
+    def elements(self, name):
+        return self.driver.find_elements(*self.locator(name))
+
+    # Running an action on a named element, resolving it once more if the handle went stale
+    def act(self, name, action):
+        try:
+            return action(self.element(name))
+        except StaleElementReferenceException:
+            # the stale handle saved no round trip, so it does not count as a hit
+            stats["hits"] -= 1
+            stats["stale"] += 1
+            self.cache.drop(self.locator(name))
+            return action(self.element(name))
+
+    def click(self, name):
+        self.act(name, lambda element: element.click())
+
+    def type(self, name, text):
+        def clear_and_type(element):
+            element.clear()
+            element.send_keys(text)
+        self.act(name, clear_and_type)
+
+    def text(self, name):
+        return self.act(name, lambda element: element.text)
+
+    def value(self, name):
+        return self.act(name, lambda element: element.get_attribute("value"))
+
+    # Waiting until a named element is visible, clickable or present; the handle found is cached.
+    # A cached handle is checked directly and only looked up again when it went stale.
+    def wait(self, name, state="visible", timeout=10):
+        locator = self.locator(name)
+        label = f"{type(self).__name__}.{name if isinstance(name, str) else locator[1]}"
+        cached = self.cache.peek(locator)
+        if cached is not None:
+            try:
+                element = wait_for(self.driver, CONDITIONS[state](cached), timeout, name=label)
+                stats["hits"] += 1
+                return element
+            except StaleElementReferenceException:
+                stats["stale"] += 1
+                self.cache.drop(locator)
+        stats["misses"] += 1
+        element = wait_for(self.driver, CONDITIONS[state](locator), timeout, name=label)
+        self.cache.put(locator, element)
+        return element
+
+
+# Header and category navigation shared by every shop page
+class ShopPage(Page):
+    PATH = ""
+    LOCATORS = {
+        "log_out": (By.LINK_TEXT, "Log out"),
+        "title": (By.CSS_SELECTOR, ".page-title"),
+    }
+
+    def link(self, text):
+        return (By.LINK_TEXT, text)
+
+    def open_category(self, name):
+        self.wait(self.link(name), "clickable").click()
+        return CategoryPage(self.driver, self.base_url)
+
+
+class HomePage(ShopPage):
+    pass
+
+
+class CategoryPage(ShopPage):
+    LOCATORS = dict(ShopPage.LOCATORS, **{
+        "page": (By.CSS_SELECTOR, "div.page.category-page"),
+        "product": (By.CSS_SELECTOR, ".product-item"),
+        "first_product": (By.CSS_SELECTOR, ".product-item h2 a"),
+        "sort": (By.ID, "products-orderby"),
+    })
+
+
+class ProductPage(ShopPage):
+    LOCATORS = dict(ShopPage.LOCATORS, **{
+        "add_to_cart": (By.CSS_SELECTOR, "input[value='Add to cart']"),
+        "notification": (By.CSS_SELECTOR, ".bar-notification.success"),
+        "add_review": (By.LINK_TEXT, "Add your review"),
+        "review_title": (By.ID, "AddProductReview_Title"),
+        "review_text": (By.ID, "AddProductReview_ReviewText"),
+        "rating_5": (By.CSS_SELECTOR, "input[id^='addproductrating'][value='5']"),
+        "submit_review": (By.CSS_SELECTOR, "input.button-1.write-product-review-button"),
+        "review_result": (By.CSS_SELECTOR, ".result"),
+    })
+
+
+class CartPage(ShopPage):
+    PATH = "cart"
+    LOCATORS = dict(ShopPage.LOCATORS, **{
+        "quantity": (By.CSS_SELECTOR, "input.qty-input"),
+        "remove": (By.NAME, "removefromcart"),
+        "update": (By.NAME, "updatecart"),
+        "summary": (By.CSS_SELECTOR, ".order-summary-content"),
+        "errors": (By.CSS_SELECTOR, ".field-validation-error, .message-error"),
+        "terms": (By.ID, "termsofservice"),
+        "checkout": (By.ID, "checkout"),
+    })
+
+    def start_checkout(self):
+        self.wait("terms", "clickable", timeout=5).click()
+        self.wait("checkout", "clickable", timeout=5).click()
+        return CheckoutPage(self.driver, self.base_url)
+
+
+class CheckoutPage(ShopPage):
+    LOCATORS = dict(ShopPage.LOCATORS, **{
+        "guest": (By.CSS_SELECTOR, "input.button-1.checkout-as-guest-button"),
+        "billing_first_name": (By.ID, "BillingNewAddress_FirstName"),
+        "billing_next": (By.CSS_SELECTOR, "input.button-1.new-address-next-step-button"),
+        "pickup": (By.ID, "PickUpInStore"),
+        "shipping_next": (By.CSS_SELECTOR, "input.button-1.new-address-next-step-button[onclick='Shipping.save()']"),
+        "payment_method_next": (By.CSS_SELECTOR, "input.button-1.payment-method-next-step-button"),
+        "payment_info_next": (By.CSS_SELECTOR, "input.button-1.payment-info-next-step-button"),
+        "confirm": (By.CSS_SELECTOR, "input.button-1.confirm-order-next-step-button"),
+        "completed": (By.CSS_SELECTOR, ".section.order-completed"),
+    })
+
+
+def summary():
+    lookups = stats["hits"] + stats["misses"]
+    ratio = stats["hits"] / lookups if lookups else 0.0
+    return (f"{stats['hits']} of {lookups} element lookups served from the cache ({ratio:.0%}), "
+            f"{stats['stale']} stale handle(s) resolved again, {stats['invalidations']} invalidation(s) on navigation")
@@ -0,0 +1,146 @@
+import json
+import math
+import logging
+from selenium.webdriver.support.ui import WebDriverWait
+
+logger = logging.getLogger(__name__)
+
+METRICS = ["ttfb", "dom_content_loaded", "load", "first_contentful_paint", "largest_resource"]
+
+# Budgets in milliseconds per page, checked against the configured percentile.
+# The median is used by default: with a handful of samples p95 is just the slowest load,
+# so one outlier (GC pause, cold cache) would fail the budget.
+# Can be replaced with --perf-budgets <file.json> using the same layout.
+DEFAULT_BUDGETS = {
+    "samples": 5,
+    "percentile": "p50",
+    "pages": {
+        "checkout": {"ttfb": 1500, "dom_content_loaded": 3000, "load": 5000, "largest_resource": 2000},
+    },
+}
+
+# Navigation, resource and paint timings of the current document, relative to navigation start
+COLLECT = """
+var nav = performance.getEntriesByType('navigation')[0];
+var t = performance.timing;
+var timing = nav ? {
+    start: nav.startTime, responseStart: nav.responseStart,
+    domContentLoaded: nav.domContentLoadedEventEnd, load: nav.loadEventEnd
+} : {
+    start: 0, responseStart: t.responseStart - t.navigationStart,
+    domContentLoaded: t.domContentLoadedEventEnd - t.navigationStart, load: t.loadEventEnd - t.navigationStart
+};
+var resources = performance.getEntriesByType('resource').map(function (r) {
+    return {name: r.name, duration: r.duration, size: r.encodedBodySize || r.transferSize || 0};
+});
+var paint = {};
+performance.getEntriesByType('paint').forEach(function (p) { paint[p.name] = p.startTime; });
+return {timing: timing, resources: resources, paint: paint};
+"""
+
+LOADED = "return document.readyState === 'complete' && performance.timing.loadEventEnd > 0;"
+
+# Measurements of this run: (page, browser) -> summary, shown in the terminal summary
+results = {}
+
+
+# One sample of the current page: milliseconds per metric
+def collect_sample(driver):
+    data = driver.execute_script(COLLECT)
+    timing = data["timing"]
+    sample = {
+        "ttfb": timing["responseStart"] - timing["start"],
+        "dom_content_loaded": timing["domContentLoaded"] - timing["start"],
+        "load": timing["load"] - timing["start"],
+        "first_contentful_paint": data["paint"].get("first-contentful-paint"),
+        "largest_resource": None,
+    }
+    if data["resources"]:
+        largest = max(data["resources"], key=lambda r: (r["size"], r["duration"]))
+        sample["largest_resource"] = largest["duration"]
+        sample["largest_resource_name"] = largest["name"]
+    return sample
+
+
+def percentile(values, p):
+    values = sorted(values)
+    if not values:
+        return None
+    rank = (len(values) - 1) * p / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+# Fewest samples for which a single slowest sample does not move percentile p
+# (the interpolation rank stays below the second-highest value): 3 for p50, 21 for p95, 101 for p99
+def min_samples(p):
+    return math.ceil((200 - p) / (100 - p))
+
+
+def summarize(samples):
+    summary = {}
+    for metric in METRICS:
+        values = [s[metric] for s in samples if s.get(metric) is not None]
+        if values:
+            summary[metric] = {"p50": percentile(values, 50), "p95": percentile(values, 95),
+                               "p99": percentile(values, 99), "samples": len(values)}
+    return summary
+
+
+# Reloading the current page n times and summarising its timings
+def measure_page(driver, page, samples, browser=None):
+    collected = []
+    for i in range(samples):
+        driver.refresh()
+        WebDriverWait(driver, 30, poll_frequency=0.05).until(lambda d: d.execute_script(LOADED))
+        sample = collect_sample(driver)
+        logger.info(f"Sample {i + 1}/{samples} for page '{page}': TTFB {sample['ttfb']:.0f} ms, "
+                    f"DOMContentLoaded {sample['dom_content_loaded']:.0f} ms, load {sample['load']:.0f} ms")
+        collected.append(sample)
+    summary = summarize(collected)
+    browser = browser or getattr(driver, "test_browser", None) or driver.capabilities.get("browserName")
+    results[(page, browser)] = summary
+    return summary
+
+
+class PerfBudgets:
+    def __init__(self, config=None):
+        config = config or DEFAULT_BUDGETS
+        self.samples = config.get("samples", DEFAULT_BUDGETS["samples"])
+        self.percentile = config.get("percentile", DEFAULT_BUDGETS["percentile"])
+        self.pages = config.get("pages", {})
+        needed = min_samples(int(self.percentile.lstrip("p")))
+        if self.samples < needed:
+            logger.warning(f"{self.samples} samples are too few for a {self.percentile} budget, taking {needed}")
+            self.samples = needed
+
+    @classmethod
+    def load(cls, path=None, samples=None):
+        config = dict(DEFAULT_BUDGETS)
+        if path:
+            with open(path) as f:
+                config.update(json.load(f))
+        if samples:
+            config["samples"] = samples
+        return cls(config)
+
+    # Budget violations of a page summary as readable messages
+    def check(self, page, summary):
+        violations = []
+        for metric, limit in self.pages.get(page, {}).items():
+            if metric not in summary:
+                continue
+            value = summary[metric][self.percentile]
+            logger.info(f"{page} {metric} {self.percentile}: {value:.0f} ms (budget {limit} ms)")
+            if value > limit:
+                violations.append(f"{metric} {self.percentile} {value:.0f} ms > {limit} ms")
+        return violations
+
+
+def report_lines():
+    lines = []
+    for (page, browser), summary in sorted(results.items()):
+        for metric, values in summary.items():
+            lines.append(f"{page} [{browser}] {metric}: p50 {values['p50']:.0f} ms, "
+                         f"p95 {values['p95']:.0f} ms, p99 {values['p99']:.0f} ms ({values['samples']} samples)")
+    return lines
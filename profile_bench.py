@@ -0,0 +1,79 @@
+import sys
+import json
+import time
+import argparse
+import statistics
+from selenium.common.exceptions import WebDriverException
+from browser_pool import launch_driver
+from local_shop import LocalShop
+from profiles import load_profiles
+from shop_client import normalize_base_url
+
+# Comparing browser launch profiles: startup time and page-load time per profile and browser.
+# "get" is the time until driver.get() returns, which is what the tests wait for under the
+# profile's page load strategy; "ready" is the time until the page has fully loaded.
+#
+# Usage: python profile_bench.py --profiles default,headless,fast --browsers chrome,firefox --runs 3 --local-shop
+
+PAGES = ["", "books", "computing-and-internet", "cart"]
+
+
+def measure(browser, profile, base_url, runs):
+    startup, loaded, ready = [], [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        drv = launch_driver(browser, profile)
+        startup.append(time.perf_counter() - start)
+        try:
+            for page in PAGES:
+                start = time.perf_counter()
+                drv.get(base_url + page)
+                loaded.append(time.perf_counter() - start)
+                while drv.execute_script("return document.readyState") != "complete":
+                    time.sleep(0.01)
+                ready.append(time.perf_counter() - start)
+        finally:
+            drv.quit()
+    return {"startup": startup, "get": loaded, "ready": ready}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare browser launch profiles")
+    parser.add_argument("--profiles", default="default,headless,fast")
+    parser.add_argument("--browsers", default="chrome,firefox,edge")
+    parser.add_argument("--runs", type=int, default=3, help="Browser launches per profile and browser")
+    parser.add_argument("--profile-config", default=None, help="JSON file with additional launch profiles")
+    parser.add_argument("--base-url", default="https://demowebshop.tricentis.com/")
+    parser.add_argument("--local-shop", action="store_true", help="Measure against the local stand-in shop")
+    parser.add_argument("--json", default=None, help="Write the raw measurements to this file")
+    args = parser.parse_args()
+
+    profiles = load_profiles(args.profile_config)
+    shop = LocalShop().start() if args.local_shop else None
+    base_url = shop.url if shop else normalize_base_url(args.base_url)
+    results = {}
+    try:
+        for name in args.profiles.split(","):
+            for browser in args.browsers.split(","):
+                print(f"Measuring profile '{name}' on {browser}...")
+                try:
+                    results[f"{name}/{browser}"] = measure(browser, profiles[name], base_url, args.runs)
+                except WebDriverException as e:
+                    print(f"  skipped: {e.msg}")
+    finally:
+        if shop:
+            shop.stop()
+
+    print(f"\n{'profile/browser':<28}{'startup p50':>12}{'get p50':>10}{'ready p50':>11}{'ready max':>11}")
+    for key, samples in results.items():
+        print(f"{key:<28}{statistics.median(samples['startup']):>11.2f}s"
+              f"{statistics.median(samples['get']):>9.2f}s{statistics.median(samples['ready']):>10.2f}s"
+              f"{max(samples['ready']):>10.2f}s")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+import json
+from selenium import webdriver
+
+# Browser launch profiles, selected with --browser-profile.
+# More profiles (or overrides of these) can be loaded from a JSON file with --profile-config:
+# {"my-profile": {"headless": true, "window_size": [1280, 800], "page_load_strategy": "eager"}}
+DEFAULTS = {
+    "headless": False,
+    "window_size": None,            # None maximizes the window
+    "page_load_strategy": "normal",  # normal or eager (the DOM is parsed, images may still be loading)
+    "block_images": False,
+    "disable_animations": False,
+    "lean": False,                  # no extensions, sync, updates or telemetry in the temporary profile
+    "proxy": None,                  # host:port of the asset proxy (set by --asset-proxy)
+}
+
+PROFILES = {
+    "default": {},
+    "headless": {"headless": True, "window_size": [1920, 1080]},
+    "fast": {"headless": True, "window_size": [1920, 1080], "page_load_strategy": "eager",
+             "block_images": True, "disable_animations": True, "lean": True},
+}
+
+CHROMIUM_LEAN_ARGS = [
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--disable-extensions",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-background-networking",
+    "--disable-component-update",
+]
+
+FIREFOX_LEAN_PREFS = {
+    "browser.shell.checkDefaultBrowser": False,
+    "app.update.auto": False,
+    "extensions.update.enabled": False,
+    "datareporting.policy.dataSubmissionEnabled": False,
+    "toolkit.telemetry.enabled": False,
+    "browser.startup.page": 0,
+}
+
+
+# The tests look up elements right after driver.get() and clicks, so navigation has to return
+# with the document parsed; "none" would make those lookups depend on timing
+PAGE_LOAD_STRATEGIES = ("normal", "eager")
+
+
+def load_profiles(path=None):
+    profiles = {name: dict(DEFAULTS, **settings) for name, settings in PROFILES.items()}
+    if path:
+        with open(path) as f:
+            for name, settings in json.load(f).items():
+                profiles[name] = dict(profiles.get(name, DEFAULTS), **settings)
+    for name, profile in profiles.items():
+        if profile["page_load_strategy"] not in PAGE_LOAD_STRATEGIES:
+            raise ValueError(f"Profile {name}: unsupported page load strategy {profile['page_load_strategy']}")
+    return profiles
+
+
+def _chromium_options(options, profile):
+    if profile["headless"]:
+        options.add_argument("--headless=new")
+    if profile["window_size"]:
+        width, height = profile["window_size"]
+        options.add_argument(f"--window-size={width},{height}")
+    if profile["block_images"]:
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_argument("--disable-remote-fonts")
+        options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    if profile["disable_animations"]:
+        options.add_argument("--force-prefers-reduced-motion")
+        options.add_argument("--disable-smooth-scrolling")
+    if profile["lean"]:
+        for arg in CHROMIUM_LEAN_ARGS:
+            options.add_argument(arg)
+    if profile["proxy"]:
+        options.add_argument(f"--proxy-server=http://{profile['proxy']}")
+        # Chromium bypasses proxies for localhost unless told otherwise; the local shop needs it
+        options.add_argument("--proxy-bypass-list=<-loopback>")
+    return options
+
+
+def _firefox_options(options, profile):
+    if profile["headless"]:
+        options.add_argument("-headless")
+    if profile["window_size"]:
+        width, height = profile["window_size"]
+        options.add_argument(f"--width={width}")
+        options.add_argument(f"--height={height}")
+    if profile["block_images"]:
+        options.set_preference("permissions.default.image", 2)
+        options.set_preference("gfx.downloadable_fonts.enabled", False)
+    if profile["disable_animations"]:
+        options.set_preference("ui.prefersReducedMotion", 1)
+        options.set_preference("toolkit.cosmeticAnimations.enabled", False)
+        options.set_preference("general.smoothScroll", False)
+    if profile["lean"]:
+        for name, value in FIREFOX_LEAN_PREFS.items():
+            options.set_preference(name, value)
+    if profile["proxy"]:
+        host, _, port = profile["proxy"].rpartition(":")
+        options.set_preference("network.proxy.type", 1)
+        for scheme in ("http", "ssl"):
+            options.set_preference(f"network.proxy.{scheme}", host)
+            options.set_preference(f"network.proxy.{scheme}_port", int(port))
+        options.set_preference("network.proxy.no_proxies_on", "")
+        options.set_preference("network.proxy.allow_hijacking_localhost", True)
+    return options
+
+
+# Building the WebDriver options of a browser for a launch profile
+def build_options(browser, profile):
+    if browser == "chrome":
+        options = _chromium_options(webdriver.ChromeOptions(), profile)
+    elif browser == "firefox":
+        options = _firefox_options(webdriver.FirefoxOptions(), profile)
+    elif browser == "edge":
+        options = _chromium_options(webdriver.EdgeOptions(), profile)
+    else:
+        raise ValueError(f"Unsupported browser: {browser}")
+    options.page_load_strategy = profile["page_load_strategy"]
+    return options
@@ -0,0 +1,163 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+import subprocess
+import xml.etree.ElementTree as ET
+from scheduling import DURATION_STORE, estimates, load_durations, lpt_shards, merge_durations, plan_lines
+
+# Running the suite on several worker processes.
+# Every worker is a separate pytest process with its own browser pool, so each
+# worker has its own drivers and its own guest session (cookies, cart).
+# The logged-in tests all share the one test account and its cart, so they form a
+# serial group (conftest.py) that is always given to a single worker.
+# Tests are balanced between the workers by their recorded durations (scheduling.py).
+# Per-worker JUnit reports and logs are merged into one report and one log, and the
+# durations every worker recorded into its own store are merged into the shared one.
+#
+# Usage: python run_parallel.py -n 4 [pytest args...]
+
+WORK_DIR = ".parallel"
+
+
+def collect(pytest_args):
+    cmd = [sys.executable, "-m", "pytest", "--collect-only", "-q"] + pytest_args
+    output = subprocess.run(cmd, capture_output=True, text=True).stdout
+    return [line.strip() for line in output.splitlines() if "::" in line]
+
+
+# Serial group of every grouped test: node id -> group name
+def collect_groups(pytest_args):
+    cmd = [sys.executable, "-m", "pytest", "--serial-groups", "-q", "-p", "no:cacheprovider"] + pytest_args
+    output = subprocess.run(cmd, capture_output=True, text=True).stdout
+    groups = {}
+    for line in output.splitlines():
+        group, _, node_id = line.strip().partition(" ")
+        if "::" in node_id:
+            groups[node_id] = group
+    return groups
+
+
+# Splitting node ids between workers by their recorded durations, longest first.
+# Within a worker the tests keep their collection order.
+def distribute(node_ids, workers, durations_store=DURATION_STORE, groups=None):
+    estimate = estimates(node_ids, load_durations(durations_store))
+    shards = lpt_shards(node_ids, estimate, workers, groups)
+    position = {node_id: i for i, node_id in enumerate(node_ids)}
+    return [sorted(shard["tests"], key=position.get) for shard in shards if shard["tests"]], shards
+
+
+# A worker runs the same pytest arguments as the collection; its share of the node ids
+# is passed in a file, so no argument has to be told apart from an option's value
+def start_worker(index, node_ids, pytest_args):
+    env = dict(os.environ)
+    env["TEST_WORKER_ID"] = f"gw{index}"
+    selection = os.path.join(WORK_DIR, f"nodes.gw{index}.txt")
+    with open(selection, "w") as f:
+        f.write("\n".join(node_ids) + "\n")
+    cmd = [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider",
+           f"--junitxml={os.path.join(WORK_DIR, f'report.gw{index}.xml')}",
+           f"--log-file={os.path.join(WORK_DIR, f'test_log.gw{index}.log')}",
+           "--log-file-level=INFO", f"--durations-store={worker_durations(index)}",
+           f"--select-nodes={selection}"] + pytest_args
+    stdout = open(os.path.join(WORK_DIR, f"output.gw{index}.txt"), "w")
+    return subprocess.Popen(cmd, env=env, stdout=stdout, stderr=subprocess.STDOUT), stdout
+
+
+# Merging per-worker JUnit XML files into a single report
+def merge_reports(count, target):
+    merged = ET.Element("testsuites")
+    suite = ET.SubElement(merged, "testsuite", name="pytest")
+    totals = {"tests": 0, "failures": 0, "errors": 0, "skipped": 0}
+    total_time = 0.0
+    for index in range(count):
+        path = os.path.join(WORK_DIR, f"report.gw{index}.xml")
+        if not os.path.exists(path):
+            totals["errors"] += 1
+            continue
+        for worker_suite in ET.parse(path).getroot().iter("testsuite"):
+            for key in totals:
+                totals[key] += int(worker_suite.get(key, 0))
+            total_time += float(worker_suite.get("time", 0))
+            for case in worker_suite.iter("testcase"):
+                case.set("worker", f"gw{index}")
+                suite.append(case)
+    for key, value in totals.items():
+        suite.set(key, str(value))
+    suite.set("time", f"{total_time:.3f}")
+    ET.ElementTree(merged).write(target, encoding="utf-8", xml_declaration=True)
+    return totals, total_time
+
+
+def worker_durations(index):
+    return os.path.join(WORK_DIR, f"durations.gw{index}.json")
+
+
+# Merging the durations recorded by the workers into the shared store
+def merge_worker_durations(count, target):
+    for index in range(count):
+        merge_durations(target, load_durations(worker_durations(index)))
+
+
+# Merging per-worker logs into one log, worker by worker
+def merge_logs(count, target):
+    with open(target, "w") as out:
+        for index in range(count):
+            path = os.path.join(WORK_DIR, f"test_log.gw{index}.log")
+            if not os.path.exists(path):
+                continue
+            out.write(f"===== worker gw{index} =====\n")
+            with open(path) as f:
+                for line in f:
+                    out.write(f"[gw{index}] {line}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the test suite on several worker processes")
+    parser.add_argument("-n", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="Number of worker processes")
+    parser.add_argument("--report", default="report.xml", help="Merged JUnit XML report")
+    parser.add_argument("--log", default="test_log.log", help="Merged log file")
+    parser.add_argument("--durations-store", default=DURATION_STORE,
+                        help="Recorded test durations used to balance the workers")
+    parser.add_argument("--plan", action="store_true", help="Print the worker assignment and exit")
+    args, pytest_args = parser.parse_known_args()
+    if not pytest_args:
+        pytest_args = ["tests2.py"]
+
+    node_ids = collect(pytest_args)
+    if not node_ids:
+        print("No tests collected")
+        return 1
+    shards, plan = distribute(node_ids, max(1, args.workers), args.durations_store, collect_groups(pytest_args))
+    if args.plan:
+        for line in plan_lines(plan):
+            print(line)
+        return 0
+
+    shutil.rmtree(WORK_DIR, ignore_errors=True)
+    os.makedirs(WORK_DIR)
+    print(f"Running {len(node_ids)} tests on {len(shards)} worker(s)")
+    start = time.perf_counter()
+    workers = [start_worker(index, shard, pytest_args) for index, shard in enumerate(shards)]
+    codes = []
+    for proc, stdout in workers:
+        codes.append(proc.wait())
+        stdout.close()
+    wall_time = time.perf_counter() - start
+
+    totals, test_time = merge_reports(len(shards), args.report)
+    merge_logs(len(shards), args.log)
+    merge_worker_durations(len(shards), args.durations_store)
+    for index, code in enumerate(codes):
+        print(f"gw{index}: {len(shards[index])} test(s), ~{plan[index]['estimate']:.1f}s estimated, exit code {code}")
+    print(f"{totals['tests']} tests, {totals['failures']} failed, {totals['errors']} errors, "
+          f"{totals['skipped']} skipped")
+    print(f"Wall time {wall_time:.2f}s, summed worker time {test_time:.2f}s")
+    print(f"Report: {args.report}, log: {args.log}")
+    return 0 if all(code == 0 for code in codes) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+import os
+import json
+import statistics
+import pytest
+
+# Duration-aware scheduling. The duration of every test id (one id per browser, e.g.
+# tests2.py::test_guest_checkout[chrome]) is kept in a local JSON store. Tests are split
+# into shards with longest-processing-time-first: the longest test goes to the least
+# loaded shard. Tests without history get the median of the known durations. Tests
+# marked with the same serial_group always land on the same shard.
+#
+#     pytest --shard-count 4 --shard-index 0     run one shard
+#     pytest --shard-count 4 --shard-plan        print the plan for 4 CI machines
+#
+# Loaded by conftest.py; run_parallel.py uses the same plan for its workers.
+
+DURATION_STORE = os.path.join("traces", "test_durations.json")
+HISTORY = 5
+FALLBACK_ESTIMATE = 10.0
+
+
+def load_durations(path=DURATION_STORE):
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+# Adding this run's durations (node id -> seconds) to the store.
+# The store is re-read and rewritten without a lock, so it must have one writer at a time:
+# run_parallel.py gives every worker a store of its own and merges them afterwards.
+def save_durations(path, new):
+    merge_durations(path, {node_id: [seconds] for node_id, seconds in new.items()})
+
+
+# Adding recorded samples (node id -> list of seconds) to the store, keeping the last HISTORY
+def merge_durations(path, recorded):
+    if not path or not recorded:
+        return
+    durations = load_durations(path)
+    for node_id, samples in recorded.items():
+        durations[node_id] = (durations.get(node_id, []) + [round(s, 3) for s in samples])[-HISTORY:]
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w") as f:
+        json.dump(durations, f, indent=1, sort_keys=True)
+    os.replace(temporary, path)
+
+
+# Estimated seconds per node id
+def estimates(node_ids, durations, default=None):
+    known = {node_id: statistics.mean(samples) for node_id, samples in durations.items() if samples}
+    if default is None:
+        default = statistics.median(known.values()) if known else FALLBACK_ESTIMATE
+    return {node_id: known.get(node_id, default) for node_id in node_ids}
+
+
+# Longest-processing-time-first: deterministic for the same estimates (ties by node id and shard index).
+# Tests of the same serial group (node id -> group name) are placed together as one unit.
+def lpt_shards(node_ids, estimate, count, groups=None):
+    groups = groups or {}
+    units = {}
+    for node_id in node_ids:
+        units.setdefault(groups.get(node_id, node_id), []).append(node_id)
+    shards = [{"tests": [], "estimate": 0.0} for _ in range(count)]
+    for tests in sorted(units.values(), key=lambda t: (-sum(estimate[n] for n in t), t[0])):
+        shard = shards[min(range(count), key=lambda i: (shards[i]["estimate"], i))]
+        shard["tests"].extend(tests)
+        shard["estimate"] += sum(estimate[n] for n in tests)
+    return shards
+
+
+# Serial group of every test marked with @pytest.mark.serial_group(name): node id -> name
+def serial_groups(items):
+    groups = {}
+    for item in items:
+        marker = item.get_closest_marker("serial_group")
+        if marker:
+            groups[item.nodeid] = marker.args[0]
+    return groups
+
+
+def plan_lines(shards):
+    lines = []
+    total = sum(shard["estimate"] for shard in shards)
+    makespan = max(shard["estimate"] for shard in shards) if shards else 0.0
+    lines.append(f"{sum(len(s['tests']) for s in shards)} tests, ~{total:.1f}s in total, "
+                 f"~{makespan:.1f}s on the longest of {len(shards)} shard(s)")
+    for index, shard in enumerate(shards):
+        lines.append(f"shard {index}: {len(shard['tests'])} test(s), ~{shard['estimate']:.1f}s")
+        for node_id in shard["tests"]:
+            lines.append(f"    {node_id}")
+    return lines
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("scheduling", "duration-aware scheduling")
+    group.addoption("--durations-store", default=DURATION_STORE,
+                    help="JSON file with the recorded durations per test id ('' disables recording)")
+    group.addoption("--default-duration", type=float, default=None,
+                    help="Estimated seconds for tests without history (default: median of the known ones)")
+    group.addoption("--shard-count", type=int, default=1, help="Number of shards the suite is split into")
+    group.addoption("--shard-index", type=int, default=0, help="Shard run by this process (0-based)")
+    group.addoption("--shard-plan", action="store_true",
+                    help="Print the shard assignment for --shard-count and exit without running tests")
+    group.addoption("--serial-groups", action="store_true",
+                    help="Print the serial group of every grouped test and exit without running tests")
+    group.addoption("--select-nodes", default=None,
+                    help="File with the node ids to run, one per line; the others are deselected")
+    group.addoption("--test-order", choices=["file", "lpt"], default="file",
+                    help="Order inside a shard: file order or longest tests first")
+
+
+class DurationRecorder:
+    def __init__(self, path):
+        self.path = path
+        self.new = {}
+
+    # setup, call and teardown all count: the pooled driver's setup is part of the test's cost
+    def pytest_runtest_logreport(self, report):
+        self.new[report.nodeid] = self.new.get(report.nodeid, 0.0) + report.duration
+
+    def pytest_sessionfinish(self, session):
+        save_durations(self.path, self.new)
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "serial_group(name): tests of the group always run on the same shard "
+                                       "or worker, e.g. because they share server-side state")
+    count, index = config.getoption("--shard-count"), config.getoption("--shard-index")
+    if count < 1 or not 0 <= index < count:
+        raise pytest.UsageError(f"Invalid shard {index} of {count}")
+    path = config.getoption("--durations-store")
+    listing = config.getoption("--shard-plan") or config.getoption("--serial-groups")
+    if path and not listing and not config.getoption("--collect-only"):
+        config.pluginmanager.register(DurationRecorder(path), "duration-recorder")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--select-nodes"):
+        with open(config.getoption("--select-nodes")) as f:
+            wanted = {line.strip() for line in f if line.strip()}
+        deselected = [item for item in items if item.nodeid not in wanted]
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+            items[:] = [item for item in items if item.nodeid in wanted]
+    count = config.getoption("--shard-count")
+    plan = config.getoption("--shard-plan")
+    order = config.getoption("--test-order")
+    groups = serial_groups(items)
+    if config.getoption("--serial-groups"):
+        lines = [f"{group} {node_id}" for node_id, group in groups.items()]
+        return _list_and_deselect(config, items, lines)
+    if count == 1 and not plan and order == "file":
+        return
+    estimate = estimates([item.nodeid for item in items], load_durations(config.getoption("--durations-store")),
+                         config.getoption("--default-duration"))
+    shards = lpt_shards([item.nodeid for item in items], estimate, count, groups)
+    if plan:
+        return _list_and_deselect(config, items, plan_lines(shards))
+    selected = set(shards[config.getoption("--shard-index")]["tests"])
+    deselected = [item for item in items if item.nodeid not in selected]
+    kept = [item for item in items if item.nodeid in selected]
+    if order == "lpt":
+        kept.sort(key=lambda item: (-estimate[item.nodeid], item.nodeid))
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+    items[:] = kept
+
+
+def _list_and_deselect(config, items, lines):
+    reporter = config.pluginmanager.get_plugin("terminalreporter")
+    for line in lines:
+        reporter.write_line(line)
+    config.hook.pytest_deselected(items=list(items))
+    items[:] = []
+
+
+# Printing the plan or the groups runs no tests, which is not a failure
+@pytest.hookimpl(trylast=True)
+def pytest_sessionfinish(session, exitstatus):
+    listing = session.config.getoption("--shard-plan") or session.config.getoption("--serial-groups")
+    if listing and exitstatus == pytest.ExitCode.NO_TESTS_COLLECTED:
+        session.exitstatus = pytest.ExitCode.OK
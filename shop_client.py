@@ -0,0 +1,115 @@
+import re
+import json
+import logging
+import http.cookiejar
+import urllib.parse
+import urllib.request
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+PRODUCT_ITEM = re.compile(r'<div class="product-item" data-productid="(\d+)">.*?<h2 class="product-title">\s*<a href="([^"]+)"', re.S)
+
+
+# Base URLs end with a slash, so that relative paths can be appended to them
+def normalize_base_url(base_url):
+    return base_url.rstrip("/") + "/"
+
+
+def _to_jar_cookie(cookie, host):
+    return http.cookiejar.Cookie(
+        version=0, name=cookie["name"], value=cookie["value"], port=None, port_specified=False,
+        domain=host, domain_specified=False, domain_initial_dot=False,
+        path=cookie.get("path", "/"), path_specified=True, secure=cookie.get("secure", False),
+        expires=cookie.get("expiry"), discard=False, comment=None, comment_url=None,
+        rest={"HttpOnly": None} if cookie.get("httpOnly") else {},
+    )
+
+
+# HTTP client for the shop that builds state (cart, login) without a browser.
+# Its cookie jar can be exchanged with a WebDriver session in both directions.
+class ShopClient:
+    def __init__(self, base_url, timeout=10):
+        self.base_url = normalize_base_url(base_url)
+        self.host = urlsplit(self.base_url).hostname
+        self.timeout = timeout
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies))
+
+    def url(self, path):
+        return urllib.parse.urljoin(self.base_url, path.lstrip("/"))
+
+    def get(self, path):
+        with self.opener.open(self.url(path), timeout=self.timeout) as response:
+            return response.geturl(), response.read().decode("utf-8", "replace")
+
+    def post(self, path, data=None, headers=None):
+        body = urllib.parse.urlencode(data or {}).encode()
+        request = urllib.request.Request(self.url(path), data=body, headers=headers or {}, method="POST")
+        with self.opener.open(request, timeout=self.timeout) as response:
+            return response.geturl(), response.read().decode("utf-8", "replace")
+
+    # Finding the first product of a category page: (product id, relative product url)
+    def first_product(self, category="books"):
+        _, html = self.get(category)
+        match = PRODUCT_ITEM.search(html)
+        if not match:
+            raise AssertionError(f"No products found for category {category}.")
+        return int(match.group(1)), match.group(2)
+
+    def add_to_cart(self, product_id, quantity=1):
+        logger.info(f"Adding product {product_id} (quantity {quantity}) to the cart over HTTP")
+        _, body = self.post(
+            f"addproducttocart/details/{product_id}/1",
+            {f"addtocart_{product_id}.EnteredQuantity": quantity},
+            headers={"X-Requested-With": "XMLHttpRequest"},
+        )
+        result = json.loads(body)
+        if not result.get("success"):
+            raise AssertionError(f"Could not add product {product_id} to the cart: {result.get('message')}")
+        return result
+
+    # Putting the first product of a category into the cart: (product id, relative product url)
+    def add_first_product(self, category="books", quantity=1):
+        product_id, product_path = self.first_product(category)
+        self.add_to_cart(product_id, quantity)
+        return product_id, product_path
+
+    # Copying WebDriver style cookies (dicts) into the client's jar
+    def load_cookies(self, cookies):
+        for cookie in cookies:
+            self.cookies.set_cookie(_to_jar_cookie(cookie, self.host))
+
+    # Copying the browser's shop cookies into the client's jar
+    def load_cookies_from(self, driver):
+        self.load_cookies(driver.get_cookies())
+
+    # Replacing the browser's shop cookies with the client's jar
+    def inject_into(self, driver):
+        driver.delete_all_cookies()
+        for cookie in self.cookies:
+            if cookie.domain.lstrip(".") != self.host:
+                continue
+            selenium_cookie = {"name": cookie.name, "value": cookie.value,
+                               "path": cookie.path, "secure": cookie.secure,
+                               "httpOnly": cookie.has_nonstandard_attr("HttpOnly")}
+            if cookie.expires:
+                selenium_cookie["expiry"] = cookie.expires
+            driver.add_cookie(selenium_cookie)
+
+
+# Opening a cheap page on the shop's domain so that cookies can be read and set
+def open_shop_domain(driver, base_url):
+    if urlsplit(driver.current_url).hostname != urlsplit(base_url).hostname:
+        driver.get(urllib.parse.urljoin(base_url, "favicon.ico"))
+
+
+# Putting products into the browser's cart with direct HTTP requests.
+# Works for guest and logged-in sessions: the browser's cookies are reused.
+def seed_cart(driver, base_url, category="books", quantity=1):
+    open_shop_domain(driver, base_url)
+    client = ShopClient(base_url)
+    client.load_cookies_from(driver)
+    client.add_first_product(category, quantity)
+    client.inject_into(driver)
+    return client
@@ -0,0 +1,86 @@
+import os
+import pytest
+import asset_proxy
+from asset_proxy import AssetCache
+
+CSS = [("Content-Type", "text/css")]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(asset_proxy, "time", clock)
+    return clock
+
+
+def objects(cache):
+    return sorted(os.listdir(cache.objects))
+
+
+def test_lookup_returns_stored_headers_and_body(tmp_path, clock):
+    cache = AssetCache(str(tmp_path))
+    cache.store("http://shop/a.css", CSS, b"body")
+    assert cache.lookup("http://shop/a.css") == (CSS, b"body")
+    assert cache.lookup("http://shop/b.css") is None
+
+
+def test_identical_bodies_are_stored_once(tmp_path, clock):
+    cache = AssetCache(str(tmp_path))
+    cache.store("http://shop/a.css", CSS, b"same")
+    cache.store("http://shop/b.css", CSS, b"same")
+    assert len(objects(cache)) == 1
+    assert cache.size == 4
+
+    # a.css changes; the old body stays while b.css still uses it
+    cache.store("http://shop/a.css", CSS, b"changed")
+    assert len(objects(cache)) == 2
+    assert cache.size == 4 + 7
+    assert cache.lookup("http://shop/b.css") == (CSS, b"same")
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path, clock):
+    cache = AssetCache(str(tmp_path), max_bytes=10)
+    cache.store("http://shop/a.css", CSS, b"aaaa")
+    clock.now += 1
+    cache.store("http://shop/b.css", CSS, b"bbbb")
+    clock.now += 1
+    cache.lookup("http://shop/a.css")
+    clock.now += 1
+    cache.store("http://shop/c.css", CSS, b"cccc")
+    assert sorted(cache.index) == ["http://shop/a.css", "http://shop/c.css"]
+    assert cache.size == 8
+    assert len(objects(cache)) == 2
+
+
+def test_entries_expire_after_the_ttl(tmp_path, clock):
+    cache = AssetCache(str(tmp_path), ttl=60)
+    cache.store("http://shop/a.css", CSS, b"body")
+    clock.now += 60
+    assert cache.lookup("http://shop/a.css") is not None
+    clock.now += 1
+    assert cache.lookup("http://shop/a.css") is None
+    assert objects(cache) == []
+    assert cache.size == 0
+
+
+def test_index_survives_a_restart_and_orphans_are_removed(tmp_path, clock):
+    cache = AssetCache(str(tmp_path))
+    cache.store("http://shop/a.css", CSS, b"body")
+    cache.save()
+    with open(os.path.join(cache.objects, "orphan"), "wb") as f:
+        f.write(b"left behind")
+
+    reopened = AssetCache(str(tmp_path))
+    headers, body = reopened.lookup("http://shop/a.css")
+    assert [tuple(header) for header in headers] == CSS and body == b"body"
+    assert objects(reopened) == objects(cache)
+    assert "orphan" not in objects(reopened)
+    assert reopened.size == 4
@@ -0,0 +1,30 @@
+import pytest
+from benchmark import compare, mann_whitney_greater
+
+
+def test_mann_whitney_clearly_slower():
+    assert mann_whitney_greater([4, 5, 6], [1, 2, 3]) == pytest.approx(0.0404, abs=0.0005)
+
+
+def test_mann_whitney_not_slower():
+    assert mann_whitney_greater([1, 2, 3], [4, 5, 6]) > 0.95
+
+
+def test_mann_whitney_identical_samples():
+    assert mann_whitney_greater([1, 1, 1], [1, 1, 1]) == 1.0
+
+
+def test_compare_regression():
+    row = compare([1.3] * 4 + [1.4] * 4, [1.0] * 4 + [1.1] * 4, threshold=0.10, alpha=0.05)
+    assert row["status"] == "REGRESSION"
+    assert row["change"] == pytest.approx(0.3 / 1.05)
+
+
+def test_compare_small_slowdown_is_ok():
+    row = compare([1.05, 1.06, 1.07, 1.08], [1.0, 1.01, 1.02, 1.03], threshold=0.10, alpha=0.05)
+    assert row["status"] == "OK"
+
+
+def test_compare_improvement():
+    row = compare([0.5, 0.6, 0.7, 0.8], [1.0, 1.1, 1.2, 1.3], threshold=0.10, alpha=0.05)
+    assert row["status"] == "IMPROVED"
@@ -0,0 +1,33 @@
+from checkpoints import CheckpointStore
+from http_pages import Page
+from pages import CartPage, CheckoutPage
+from shop_client import ShopClient
+
+
+# (product name, quantity) of every cart line, read over HTTP with the browser's cookies
+def cart_contents(driver, base_url):
+    client = ShopClient(base_url)
+    client.load_cookies_from(driver)
+    url, html = client.get("cart")
+    return [(row.find(cls="product-name").text(), row.find("input", cls="qty-input").attrs["value"])
+            for row in Page(url, 200, html).find_all("tr", cls="cart-item-row")]
+
+
+# A restored checkout starts from the same cart as a replayed one, even after a test changed the cart
+def test_restored_checkout_has_the_replayed_cart(headless_driver, stand_in_shop):
+    base_url = stand_in_shop.url
+    store = CheckpointStore(base_url)
+    store.reach(headless_driver, "checkout", "focused")
+    assert store.replays == {"checkout": 1, "cart": 1}
+    replayed = cart_contents(headless_driver, base_url)
+    assert len(replayed) == 1 and replayed[0][1] == "1"
+
+    cart = CartPage(headless_driver, base_url).open()
+    cart.type("quantity", "3")
+    cart.click("update")
+    assert cart_contents(headless_driver, base_url)[0][1] == "3"
+
+    store.reach(headless_driver, "checkout", "focused")
+    assert store.restores == {"checkout": 1}
+    assert cart_contents(headless_driver, base_url) == replayed
+    CheckoutPage(headless_driver, base_url).wait("billing_first_name")
@@ -0,0 +1,35 @@
+import pages
+from pages import HomePage
+from waits import wait_for, staleness_of
+
+
+# A click that loads a new page is no navigation command, so the cache still holds the old
+# page's handle; the lookup finds it stale and resolves the locator on the new page
+def test_cached_locator_after_click_navigation(headless_driver, stand_in_shop):
+    home = HomePage(headless_driver, stand_in_shop.url).open()
+    books = home.link("Books")
+    old_handle = home.element(books)
+    stale = pages.stats["stale"]
+
+    home.click(home.link("Computers"))
+    wait_for(headless_driver, staleness_of(old_handle), name="category page")
+    assert headless_driver.current_url.endswith("/computers")
+    assert home.cache.peek(books) is old_handle
+
+    assert home.text(books) == "Books"
+    assert pages.stats["stale"] == stale + 1
+    assert home.cache.peek(books) is not old_handle
+
+
+# The same recovery for a wait on a cached handle
+def test_cached_wait_after_click_navigation(headless_driver, stand_in_shop):
+    home = HomePage(headless_driver, stand_in_shop.url).open()
+    books = home.link("Books")
+    old_handle = home.wait(books, "clickable")
+    stale = pages.stats["stale"]
+
+    old_handle.click()
+    wait_for(headless_driver, staleness_of(old_handle), name="category page")
+
+    assert home.wait(books, "clickable") is not old_handle
+    assert pages.stats["stale"] == stale + 1
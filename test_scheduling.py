@@ -0,0 +1,51 @@
+import json
+from scheduling import FALLBACK_ESTIMATE, HISTORY, estimates, load_durations, lpt_shards, merge_durations, \
+    save_durations
+
+
+def test_lpt_balances_longest_first():
+    estimate = {"a": 8.0, "b": 7.0, "c": 6.0, "d": 5.0, "e": 4.0}
+    shards = lpt_shards(list(estimate), estimate, 2)
+    assert [shard["tests"] for shard in shards] == [["a", "d", "e"], ["b", "c"]]
+    assert [shard["estimate"] for shard in shards] == [17.0, 13.0]
+
+
+def test_lpt_is_deterministic_on_ties():
+    estimate = {"b": 1.0, "a": 1.0, "d": 1.0, "c": 1.0}
+    shards = lpt_shards(list(estimate), estimate, 2)
+    assert [shard["tests"] for shard in shards] == [["a", "c"], ["b", "d"]]
+
+
+def test_serial_group_stays_on_one_shard():
+    estimate = {"login1": 3.0, "login2": 3.0, "login3": 3.0, "x": 5.0, "y": 4.0, "z": 2.0}
+    groups = {"login1": "account", "login2": "account", "login3": "account"}
+    shards = lpt_shards(list(estimate), estimate, 3, groups)
+    holding = [shard for shard in shards if set(groups) & set(shard["tests"])]
+    assert len(holding) == 1
+    assert set(groups) <= set(holding[0]["tests"])
+    assert holding[0]["estimate"] == 9.0
+    assert sorted(node for shard in shards for node in shard["tests"]) == sorted(estimate)
+
+
+def test_unknown_tests_get_the_median_of_known_durations():
+    durations = {"a": [1.0, 3.0], "b": [4.0], "c": [10.0]}
+    estimate = estimates(["a", "b", "c", "new"], durations)
+    assert estimate["a"] == 2.0
+    assert estimate["new"] == 4.0
+
+
+def test_estimates_fall_back_without_history():
+    assert estimates(["a"], {}) == {"a": FALLBACK_ESTIMATE}
+    assert estimates(["a"], {}, default=3.0) == {"a": 3.0}
+
+
+def test_save_and_merge_keep_the_last_samples(tmp_path):
+    path = str(tmp_path / "durations.json")
+    for seconds in range(HISTORY):
+        save_durations(path, {"a": float(seconds)})
+    merge_durations(path, {"a": [10.0, 11.0], "b": [1.23456]})
+    with open(path) as f:
+        durations = json.load(f)
+    assert durations["a"] == [2.0, 3.0, 4.0, 10.0, 11.0]
+    assert durations["b"] == [1.235]
+    assert load_durations(str(tmp_path / "missing.json")) == {}
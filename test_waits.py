@@ -0,0 +1,31 @@
+import time
+import pytest
+from local_shop import LocalShop
+from waits import ajax_idle, wait_for
+
+# Every response of the shop is delayed by this many seconds
+LATENCY = 0.5
+
+REQUESTS = {
+    "xhr": "var xhr = new XMLHttpRequest(); xhr.open('GET', arguments[0]); xhr.send();",
+    "fetch": "fetch(arguments[0]);",
+}
+
+
+@pytest.fixture(scope="module")
+def slow_shop():
+    shop = LocalShop(latency=LATENCY).start()
+    yield shop
+    shop.stop()
+
+
+# A request the page starts after the tracker is installed holds the wait open until it is answered
+@pytest.mark.parametrize("kind", REQUESTS)
+def test_ajax_idle_waits_for_requests(headless_driver, slow_shop, kind):
+    headless_driver.get(slow_shop.url)
+    wait_for(headless_driver, ajax_idle(), name="page idle")
+    start = time.perf_counter()
+    headless_driver.execute_script(REQUESTS[kind], slow_shop.url + "books")
+    assert not ajax_idle()(headless_driver)
+    wait_for(headless_driver, ajax_idle(), timeout=5, name="request answered")
+    assert time.perf_counter() - start >= LATENCY
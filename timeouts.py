@@ -0,0 +1,102 @@
+import os
+import json
+import logging
+from perf_metrics import percentile
+
+logger = logging.getLogger(__name__)
+
+# Adaptive wait timeouts. The durations of every named wait are kept across runs in a
+# local JSON store, per browser. Once a wait has enough history its timeout becomes
+# percentile(durations) * factor, clamped to [floor, ceiling]; until then the timeout
+# given by the caller is used. Overrides (name -> seconds) always win. The ceiling stays at
+# the suite's old fixed 10 seconds, so a hung page still fails fast; only an override goes above it.
+#
+# A broken locator then fails after roughly its usual duration times the factor
+# instead of the hard-coded 10 seconds.
+
+TIMEOUT_STORE = os.path.join("traces", "wait_timeouts.json")
+
+
+class AdaptiveTimeouts:
+    def __init__(self, path=TIMEOUT_STORE, percentile=99, factor=3.0, floor=2.0, ceiling=10.0,
+                 min_samples=5, history=200, overrides=None):
+        self.path = path
+        self.percentile = percentile
+        self.factor = factor
+        self.floor = floor
+        self.ceiling = ceiling
+        self.min_samples = min_samples
+        self.history = history
+        self.overrides = overrides or {}
+        self.durations = self.load(path)
+        self.new = {}
+        self.used = {}
+
+    @staticmethod
+    def load(path):
+        if not path or not os.path.exists(path):
+            return {}
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as ex:
+            logger.info(f"Ignoring unreadable timeout store {path}: {ex}")
+            return {}
+
+    # Keyed by the test matrix browser (chrome, firefox, edge) like the page metrics
+    @staticmethod
+    def key(driver, name):
+        browser = getattr(driver, "test_browser", None)
+        if not browser:
+            browser = getattr(driver, "capabilities", {}).get("browserName", "unknown")
+        return f"{name} [{browser}]"
+
+    # Timeout in seconds for a wait; default is the caller's timeout
+    def timeout(self, driver, name, default):
+        key = self.key(driver, name)
+        if name in self.overrides or key in self.overrides:
+            timeout, source = self.overrides.get(key, self.overrides.get(name)), "override"
+        else:
+            samples = self.durations.get(key, [])
+            if len(samples) >= self.min_samples:
+                learned = percentile(samples, self.percentile) * self.factor
+                timeout = min(max(learned, self.floor), self.ceiling)
+                source = f"learned from {len(samples)} samples"
+            else:
+                timeout, source = default, "default"
+        self.used[key] = (timeout, source)
+        return timeout
+
+    def source(self, driver, name):
+        return self.used.get(self.key(driver, name), (None, "default"))[1]
+
+    # Durations of successful waits only; timeouts say nothing about how long the page needs
+    def record(self, driver, name, elapsed):
+        key = self.key(driver, name)
+        self.new.setdefault(key, []).append(round(elapsed, 4))
+        samples = self.durations.setdefault(key, [])
+        samples.append(round(elapsed, 4))
+        del samples[:-self.history]
+
+    # Merging this run's durations into the store; re-read first so parallel workers do not drop each other's
+    def save(self):
+        if not self.path or not self.new:
+            return
+        durations = self.load(self.path)
+        for key, samples in self.new.items():
+            merged = durations.setdefault(key, []) + samples
+            durations[key] = merged[-self.history:]
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(durations, f, indent=1, sort_keys=True)
+        os.replace(temporary, self.path)
+
+    def summary(self):
+        lines = []
+        for key, (timeout, source) in sorted(self.used.items()):
+            if source != "default":
+                lines.append(f"{key}: {timeout:.2f}s ({source})")
+        return lines
@@ -0,0 +1,165 @@
+import os
+import sys
+import json
+import time
+import uuid
+import logging
+import argparse
+from contextlib import ContextDecorator
+
+logger = logging.getLogger(__name__)
+
+# Structured per-step tracing. Every step records its start and end time, the test id,
+# the browser and the WebDriver commands issued inside it, and is written as one JSONL line.
+#
+#     with step("Waiting for the product list"):
+#         WebDriverWait(driver, 10).until(...)
+#
+# Aggregated report of the slowest steps: python tracing.py report [--file traces/steps.jsonl]
+
+TRACE_FILE = os.path.join("traces", "steps.jsonl")
+
+
+class Tracer:
+    def __init__(self):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.test_id = None
+        self.browser = None
+        self.stack = []
+        self.records = []
+        self.file = None
+
+    def open(self, path=TRACE_FILE):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(path, "a", buffering=1)
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def begin_test(self, test_id, browser=None):
+        self.test_id = test_id
+        self.browser = browser
+        self.stack = []
+
+    def end_test(self):
+        self.test_id = None
+        self.browser = None
+        self.stack = []
+
+    # Called for every WebDriver command of an instrumented driver
+    def command(self, name):
+        if self.stack:
+            commands = self.stack[-1]["commands"]
+            commands[name] = commands.get(name, 0) + 1
+
+    def write(self, record):
+        self.records.append(record)
+        if self.file:
+            self.file.write(json.dumps(record) + "\n")
+
+
+tracer = Tracer()
+
+
+# A traced step; usable as a context manager or a decorator
+class step(ContextDecorator):
+    def __init__(self, name):
+        self.name = name
+
+    def _recreate_cm(self):
+        return step(self.name)
+
+    def __enter__(self):
+        logger.info(self.name)
+        self.record = {"run": tracer.run_id, "test": tracer.test_id, "browser": tracer.browser,
+                       "step": self.name, "depth": len(tracer.stack), "commands": {}}
+        tracer.stack.append(self.record)
+        self.record["start"] = time.time()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.started
+        record = self.record
+        if tracer.stack and tracer.stack[-1] is record:
+            tracer.stack.pop()
+        record["end"] = record["start"] + duration
+        record["duration"] = duration
+        record["command_count"] = sum(record["commands"].values())
+        record["status"] = "error" if exc_type else "ok"
+        tracer.write(record)
+        return False
+
+
+# Counting the WebDriver commands a driver issues; every command goes through execute()
+def instrument(driver):
+    if getattr(driver, "_traced", False):
+        return driver
+    execute = driver.execute
+
+    def traced_execute(driver_command, params=None):
+        tracer.command(driver_command)
+        return execute(driver_command, params)
+
+    driver.execute = traced_execute
+    driver._traced = True
+    return driver
+
+
+def load_records(path, run=None):
+    records = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                records.append(json.loads(line))
+    if run == "latest" and records:
+        run = records[-1]["run"]
+    if run and run != "all":
+        records = [r for r in records if r["run"] == run]
+    return records
+
+
+# Slowest steps across the suite, grouped by step name and browser
+def aggregate(records, top=20):
+    groups = {}
+    for record in records:
+        key = (record["step"], record.get("browser") or "-")
+        groups.setdefault(key, []).append(record)
+    rows = []
+    for (name, browser), items in groups.items():
+        durations = sorted(r["duration"] for r in items)
+        rows.append({
+            "step": name, "browser": browser, "count": len(items), "total": sum(durations),
+            "mean": sum(durations) / len(durations), "p95": durations[int(0.95 * (len(durations) - 1))],
+            "max": durations[-1], "commands": sum(r["command_count"] for r in items) / len(items),
+        })
+    rows.sort(key=lambda row: -row["total"])
+    return rows[:top]
+
+
+def report_lines(records, top=20):
+    lines = [f"{'total':>8} {'count':>5} {'mean':>7} {'p95':>7} {'max':>7} {'cmds':>5}  browser  step"]
+    for row in aggregate(records, top):
+        lines.append(f"{row['total']:>7.2f}s {row['count']:>5} {row['mean']:>6.2f}s {row['p95']:>6.2f}s "
+                     f"{row['max']:>6.2f}s {row['commands']:>5.1f}  {row['browser']:<8} {row['step']}")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report the slowest traced steps")
+    parser.add_argument("command", choices=["report"])
+    parser.add_argument("--file", default=TRACE_FILE)
+    parser.add_argument("--run", default="latest", help="Run id, 'latest' or 'all'")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+    for line in report_lines(load_records(args.file, args.run), args.top):
+        print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
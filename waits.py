@@ -0,0 +1,128 @@
+import time
+import logging
+from contextlib import contextmanager
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+logger = logging.getLogger(__name__)
+
+# Polling interval of every wait, can be changed with --wait-poll
+DEFAULT_POLL = 0.1
+
+# Time blocked per named wait during this run: name -> list of seconds
+stats = {}
+
+# Learned timeouts (timeouts.AdaptiveTimeouts), set up by conftest.py.
+# None keeps the timeouts given by the callers.
+adaptive = None
+
+# Counting pending XHR/fetch requests made by the page
+AJAX_TRACKER = """
+if (!window.__ajaxTracker) {
+    window.__ajaxTracker = true;
+    window.__pendingRequests = 0;
+    var send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        window.__pendingRequests++;
+        this.addEventListener('loadend', function () { window.__pendingRequests--; });
+        return send.apply(this, arguments);
+    };
+    if (window.fetch) {
+        var fetch = window.fetch;
+        window.fetch = function () {
+            window.__pendingRequests++;
+            return fetch.apply(this, arguments).finally(function () { window.__pendingRequests--; });
+        };
+    }
+}
+"""
+
+AJAX_IDLE = """
+if (typeof window.__pendingRequests === 'undefined') {
+""" + AJAX_TRACKER + """
+    return false;
+}
+if (document.readyState !== 'complete') { return false; }
+if (window.jQuery && window.jQuery.active > 0) { return false; }
+return window.__pendingRequests <= 0;
+"""
+
+# Page loaded and no jQuery, XHR or fetch requests in flight.
+# A new document has no request tracker yet: the first poll installs it and is not idle.
+# Requests the page started before that poll (e.g. during its own load) are not seen,
+# only the ones started afterwards hold the wait open; jQuery requests are always counted.
+def ajax_idle():
+    def condition(driver):
+        return driver.execute_script(AJAX_IDLE)
+    return condition
+
+
+# The given element (e.g. the old product grid) is no longer attached to the DOM
+def staleness_of(element):
+    return EC.staleness_of(element)
+
+
+def all_of(*conditions):
+    return EC.all_of(*conditions)
+
+
+# Waiting for a condition and recording how long the wait blocked
+# With adaptive timeouts the given timeout is only used until the wait has a history.
+def wait_for(driver, condition, timeout=10, poll=None, name="wait"):
+    if adaptive:
+        timeout = adaptive.timeout(driver, name, timeout)
+    start = time.perf_counter()
+    try:
+        result = WebDriverWait(driver, timeout, poll_frequency=poll or DEFAULT_POLL).until(condition)
+    except TimeoutException:
+        source = adaptive.source(driver, name) if adaptive else "default"
+        logger.info(f"Wait '{name}' timed out after {timeout:.2f} seconds (timeout {source})")
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        stats.setdefault(name, []).append(elapsed)
+        logger.info(f"Wait '{name}' blocked for {elapsed:.3f} seconds")
+    if adaptive:
+        adaptive.record(driver, name, elapsed)
+    return result
+
+
+# Turning the implicit wait off so that it does not stack on top of explicit polling
+@contextmanager
+def no_implicit_wait(driver):
+    previous = driver.timeouts.implicit_wait
+    if previous:
+        driver.implicitly_wait(0)
+    try:
+        yield
+    finally:
+        if previous:
+            driver.implicitly_wait(previous)
+
+
+# Waiting for whichever of several named page outcomes happens first.
+# Returns (outcome name, condition result) as soon as one of them matches.
+def wait_for_first(driver, outcomes, timeout=10, poll=None, name="first match"):
+    def condition(driver):
+        for outcome, check in outcomes.items():
+            try:
+                result = check(driver)
+            except (NoSuchElementException, StaleElementReferenceException):
+                result = False
+            if result:
+                return outcome, result
+        return False
+
+    with no_implicit_wait(driver):
+        outcome, result = wait_for(driver, condition, timeout, poll, name)
+    logger.info(f"Wait '{name}' matched outcome: {outcome}")
+    return outcome, result
+
+
+def summary():
+    lines = []
+    for name, durations in sorted(stats.items(), key=lambda item: -sum(item[1])):
+        lines.append(f"{name}: {len(durations)} wait(s), {sum(durations):.2f}s total, "
+                     f"{max(durations):.2f}s max")
+    return lines